@@ -4,25 +4,37 @@ Usage: active_directory.py
 
 Classes:
     Group()
+    MembershipIndex()
 """
 
+import csv
+import json
+import sys
+import timeit
+import tracemalloc
+
 
 class Group:
     """Creates a Group object.
 
     Attributes:
         name: A str representing the name of the group
-        groups: A list of group objects representing the groups that are
+        groups: A set of group objects representing the groups that are
             members of this group
-        users: A list of strs representing the name or ids of the users that
+        users: A set of strs representing the name or ids of the users that
             are members of this group
+        index: A MembershipIndex object kept up to date with the members of
+            this group, or None if the group is not indexed
     """
 
-    def __init__(self, name):
+    def __init__(self, name, index=None):
         """Set-up for the Group object."""
         self.name = name
-        self.groups = []
-        self.users = []
+        self.groups = set()
+        self.users = set()
+        self.index = None
+        if index is not None:
+            index.add(self)
 
     def __repr__(self):
         """Represents the group as its name."""
@@ -34,7 +46,12 @@ class Group:
         Args:
             group: A group object representing the group to add to the group
         """
-        self.groups.append(group)
+        if group in self.groups:
+            return
+
+        self.groups.add(group)
+        if self.index is not None:
+            self.index.add_group(self, group)
 
     def add_user(self, user):
         """Add a user to the group.
@@ -43,7 +60,247 @@ class Group:
             user: A str representing the name or id of the user to add to the
                 group
         """
-        self.users.append(user)
+        if user in self.users:
+            return
+
+        self.users.add(user)
+        if self.index is not None:
+            self.index.add_user(self, user)
+
+    def remove_group(self, group):
+        """Remove a group from the group.
+
+        Args:
+            group: A group object representing the group to remove from the
+                group
+        """
+        if group not in self.groups:
+            return
+
+        self.groups.remove(group)
+        if self.index is not None:
+            self.index.remove_group(self, group)
+
+    def remove_user(self, user):
+        """Remove a user from the group.
+
+        Args:
+            user: A str representing the name or id of the user to remove from
+                the group
+        """
+        if user not in self.users:
+            return
+
+        self.users.remove(user)
+        if self.index is not None:
+            self.index.remove_user(self, user)
+
+
+class MembershipIndex:
+    """Index of the users in each group including the users of its subgroups.
+
+    The index is updated as users and groups are added, so that checking if a
+    user is in a group is a single set lookup. Each group's set of users always
+    contains the sets of all of its subgroups, so an update only needs to
+    continue up to the parents of a group whose set actually changed. When a
+    member is removed, the sets of the group and the groups above it are
+    rebuilt from their subgroups.
+
+    The groups each user is effectively in are cached once asked for, and a
+    user's cached groups are dropped whenever a change adds the user to or
+    removes the user from a group's set.
+
+    Attributes:
+        members: A dict of Group objects and sets of the users in the group or
+            any of its subgroups
+        parents: A dict of Group objects and sets of the Group objects that
+            the group has been added to
+        effective: A dict of users and frozensets of the Group objects they
+            are effectively in
+    """
+
+    def __init__(self):
+        """Set-up for the membership index."""
+        self.members = {}
+        self.parents = {}
+        self.effective = {}
+
+    def add(self, group):
+        """Add a group and all of its subgroups to the index.
+
+        Args:
+            group: A Group object to index
+        """
+        new_groups = []
+        stack = [group]
+        while stack:
+            group = stack.pop()
+            if group in self.members:
+                continue
+
+            group.index = self
+            self.members[group] = set()
+            self.parents.setdefault(group, set())
+            new_groups.append(group)
+            for sub_group in group.groups:
+                self.parents.setdefault(sub_group, set()).add(group)
+                stack.append(sub_group)
+
+        for group in new_groups:
+            self.propagate(group, group.users)
+            for sub_group in group.groups:
+                self.propagate(group, self.members[sub_group])
+
+    def add_user(self, group, user):
+        """Update the index for a user added to a group.
+
+        Args:
+            group: A Group object the user was added to
+            user: A str representing the name or id of the user
+        """
+        self.propagate(group, (user,))
+
+    def add_group(self, group, sub_group):
+        """Update the index for a group added to a group.
+
+        Args:
+            group: A Group object the subgroup was added to
+            sub_group: A Group object that was added
+        """
+        self.add(sub_group)
+        self.parents[sub_group].add(group)
+        self.propagate(group, self.members[sub_group])
+
+    def propagate(self, group, users):
+        """Add users to the members of a group and of all groups above it.
+
+        Args:
+            group: A Group object to add the users to
+            users: An iterable of strs representing the names or ids of users
+        """
+        users = set(users)
+        visited = set()
+        stack = [group]
+        while stack:
+            group = stack.pop()
+            if group in visited or users <= self.members[group]:
+                continue
+
+            visited.add(group)
+            self.members[group] |= users
+            stack.extend(self.parents[group])
+
+        if visited:
+            self.invalidate(users)
+
+    def remove_user(self, group, user):
+        """Update the index for a user removed from a group.
+
+        Args:
+            group: A Group object the user was removed from
+            user: A str representing the name or id of the user
+        """
+        self.rebuild(group)
+        self.invalidate((user,))
+
+    def remove_group(self, group, sub_group):
+        """Update the index for a group removed from a group.
+
+        Args:
+            group: A Group object the subgroup was removed from
+            sub_group: A Group object that was removed
+        """
+        self.parents[sub_group].discard(group)
+        self.rebuild(group)
+        self.invalidate(self.members[sub_group])
+
+    def rebuild(self, group):
+        """Rebuild the sets of users of a group and all groups above it.
+
+        Groups that are not above the given group were not affected by the
+        change, so their sets are reused rather than walked again.
+
+        Args:
+            group: A Group object whose members have changed
+        """
+        ancestors = self.ancestors(group)
+        rebuilt = {}
+        for ancestor in ancestors:
+            users = set()
+            visited = {ancestor}
+            stack = [ancestor]
+            while stack:
+                current = stack.pop()
+                users.update(current.users)
+                for sub_group in current.groups - visited:
+                    visited.add(sub_group)
+                    if sub_group in ancestors:
+                        stack.append(sub_group)
+                    else:
+                        users |= self.members[sub_group]
+
+            rebuilt[ancestor] = users
+
+        self.members.update(rebuilt)
+
+    def ancestors(self, group):
+        """Find a group and every group above it.
+
+        Args:
+            group: A Group object in the index
+
+        Returns:
+            ancestors: A set of the group and the Group objects above it
+        """
+        ancestors = {group}
+        stack = [group]
+        while stack:
+            for parent in self.parents[stack.pop()] - ancestors:
+                ancestors.add(parent)
+                stack.append(parent)
+
+        return ancestors
+
+    def invalidate(self, users):
+        """Drop the cached effective groups of users.
+
+        Args:
+            users: An iterable of strs representing the names or ids of users
+        """
+        if not self.effective:
+            return
+
+        for user in users:
+            self.effective.pop(user, None)
+
+    def effective_groups(self, user):
+        """Find every group a user is in directly or through a subgroup.
+
+        Args:
+            user: A str representing the name or id of the user
+
+        Returns:
+            A frozenset of the Group objects in the index the user is in
+        """
+        groups = self.effective.get(user)
+        if groups is None:
+            groups = self.effective[user] = frozenset(
+                group for group, users in self.members.items() if user in users
+            )
+
+        return groups
+
+    def contains(self, group, user):
+        """Determines if a user is in a group or any of its subgroups.
+
+        Args:
+            group: A Group object in the index
+            user: A str representing the name or id of the user
+
+        Returns:
+            A boolean representing if the user is a member of the group
+        """
+        return user in self.members[group]
 
 
 def main():
@@ -65,6 +322,107 @@ def main():
     assert group_membership_1
     assert not group_membership_2
 
+    index = MembershipIndex()
+    parent = Group("parent", index)
+    child = Group("child")
+    sub_child = Group("subchild")
+    sub_child.add_user(sub_child_user)
+    child.add_group(sub_child)
+    parent.add_group(child)
+    assert sub_child.index is index
+    assert is_user_in_group(sub_child_user, parent)
+    assert not is_user_in_group("non_group_user", parent)
+    sub_child.add_user("new_user")
+    assert is_user_in_group("new_user", parent)
+    assert not is_user_in_group(sub_child_user, Group("other", index))
+    shared = Group("shared", MembershipIndex())
+    shared.add_user("shared_user")
+    late_parent = Group("late_parent")
+    late_parent.add_group(shared)
+    shared.index.add(late_parent)
+    assert is_user_in_group("shared_user", late_parent)
+
+    cycle_a = Group("cycle_a")
+    cycle_b = Group("cycle_b")
+    cycle_a.add_group(cycle_b)
+    cycle_b.add_group(cycle_a)
+    cycle_b.add_user("cycle_user")
+    assert is_user_in_group("cycle_user", cycle_a)
+    assert not is_user_in_group("non_group_user", cycle_a)
+
+    deep_group, deep_user = _build_deep(sys.getrecursionlimit() * 2, None)
+    assert is_user_in_group(deep_user, deep_group)
+
+    top = Group("top")
+    left = Group("left")
+    right = Group("right")
+    shared = Group("shared")
+    shared.add_user("shared_user")
+    left.add_user("left_user")
+    for group in (left, right):
+        group.add_group(shared)
+        top.add_group(group)
+    memberships = users_in_groups(
+        ["shared_user", "left_user"], [top, right, cycle_a]
+    )
+    assert memberships == {
+        ("shared_user", top): True,
+        ("left_user", top): True,
+        ("shared_user", right): True,
+        ("left_user", right): False,
+        ("shared_user", cycle_a): False,
+        ("left_user", cycle_a): False,
+    }
+    memo = {}
+    assert collect_users(top, memo) == {"shared_user", "left_user"}
+    assert memo[right] == {"shared_user"} and memo[shared] == {"shared_user"}
+    collect_users(cycle_a, memo)
+    assert memo[cycle_b] is memo[cycle_a] and memo[cycle_a] == {"cycle_user"}
+    assert deep_user in collect_users(deep_group)
+
+    assert index.effective_groups(sub_child_user) == {sub_child, child, parent}
+    assert index.effective_groups("non_group_user") == frozenset()
+    child.add_user("non_group_user")
+    assert index.effective_groups("non_group_user") == {child, parent}
+    child.remove_group(sub_child)
+    assert not is_user_in_group(sub_child_user, parent)
+    assert index.effective_groups(sub_child_user) == {sub_child}
+    assert index.effective_groups("non_group_user") == {child, parent}
+    child.add_group(sub_child)
+    sub_child.add_group(parent)
+    assert is_user_in_group("non_group_user", sub_child)
+    child.remove_user("non_group_user")
+    assert index.effective_groups("non_group_user") == frozenset()
+    assert index.effective_groups(sub_child_user) == {sub_child, child, parent}
+
+    edges = [
+        "admins,user,alice\n",
+        "staff,group,admins\n",
+        "staff,user,bob\n",
+        "\n",
+        "staff,user,bob\n",
+        "  \n",
+    ]
+    index = MembershipIndex()
+    groups = load_directory(edges, index=index)
+    assert groups["staff"].users == {"bob"}
+    assert is_user_in_group("alice", groups["staff"])
+    assert not is_user_in_group("bob", groups["admins"])
+    groups = load_directory(
+        [
+            '{"group": "staff", "member_group": "admins"}\n',
+            '{"group": "admins", "user": "alice"}\n',
+        ],
+        file_format="jsonl",
+    )
+    assert is_user_in_group("alice", groups["staff"])
+
+    results = benchmark_load(edge_count=5000)
+    print(f"Directory load benchmark: {results}")
+
+    timings = benchmark_membership(depth=200, width=200, checks=200)
+    print(f"Membership check benchmark (seconds): {timings}")
+
     print("All test cases passed!")
 
 
@@ -79,18 +437,347 @@ def is_user_in_group(user, group):
     Returns:
         A boolean representing if the given user is a member of the given group
     """
-    if user in group.users:
-        return True
+    if group.index is not None:
+        return group.index.contains(group, user)
 
-    if len(group.groups) == 0:
-        return False
+    visited = set()
+    stack = [group]
+    while stack:
+        group = stack.pop()
+        if group in visited:
+            continue
 
-    for sub_group in group.groups:
-        if is_user_in_group(user, sub_group):
+        if user in group.users:
             return True
 
+        visited.add(group)
+        stack.extend(group.groups)
+
     return False
 
 
+def users_in_groups(users, groups):
+    """Determines which of several users are in each of several groups.
+
+    Each group's users, including the users of its subgroups, are collected
+    once for the whole batch. Every subgroup walked along the way is
+    remembered too, so a subgroup shared by several of the groups is only
+    walked once even if it is not one of the groups itself.
+
+    Args:
+        users: An iterable of strs representing the user names or ids to check
+        groups: An iterable of Group objects to check the users against
+
+    Returns:
+        memberships: A dict of tuples of a user and a Group object and booleans
+            representing if the user is a member of the group
+    """
+    users = list(users)
+    memo = {}
+    memberships = {}
+    for group in groups:
+        group_users = collect_users(group, memo)
+        for user in users:
+            memberships[(user, group)] = user in group_users
+
+    return memberships
+
+
+def collect_users(group, memo=None):
+    """Collects the users of a group and all of its subgroups.
+
+    The subgroups are walked depth first and each one's users are collected
+    once all of its own subgroups are done, so every group walked ends up in
+    the memo, not just the one asked for. Groups in a cycle all contain each
+    other, so they are found together as a strongly connected component and
+    share a single set of users.
+
+    Args:
+        group: A Group object to collect the users of
+        memo: A dict of Group objects and their already collected users, which
+            the collected users of every group walked are added to
+
+    Returns:
+        A set of strs representing the names or ids of the users
+    """
+    if memo is None:
+        memo = {}
+
+    if group.index is not None:
+        return group.index.members[group]
+
+    if group in memo:
+        return memo[group]
+
+    order = {group: 0}
+    low = {group: 0}
+    component_stack = [group]
+    on_stack = {group}
+    stack = [(group, iter(group.groups))]
+    while stack:
+        sub_group, next_groups = stack[-1]
+        for next_group in next_groups:
+            if next_group in on_stack:
+                low[sub_group] = min(low[sub_group], order[next_group])
+            elif next_group.index is None and next_group not in memo:
+                order[next_group] = low[next_group] = len(order)
+                component_stack.append(next_group)
+                on_stack.add(next_group)
+                stack.append((next_group, iter(next_group.groups)))
+                break
+        else:
+            stack.pop()
+            if stack:
+                parent = stack[-1][0]
+                low[parent] = min(low[parent], low[sub_group])
+
+            if low[sub_group] == order[sub_group]:
+                _collect_component(sub_group, component_stack, on_stack, memo)
+
+    return memo[group]
+
+
+def _collect_component(root, component_stack, on_stack, memo):
+    """Collects the users of a strongly connected component of groups.
+
+    Args:
+        root: A Group object that was the first of the component walked
+        component_stack: A list of Group objects walked but not yet collected,
+            ending with the groups of the component
+        on_stack: A set of the Group objects in component_stack
+        memo: A dict of Group objects and their already collected users, which
+            already holds every subgroup outside of the component
+    """
+    component = []
+    while not component or component[-1] is not root:
+        component.append(component_stack.pop())
+        on_stack.discard(component[-1])
+
+    group_users = set()
+    for group in component:
+        group_users.update(group.users)
+        for sub_group in group.groups:
+            if sub_group.index is not None:
+                group_users |= sub_group.index.members[sub_group]
+            elif sub_group in memo:
+                group_users |= memo[sub_group]
+
+    for group in component:
+        memo[group] = group_users
+
+
+def load_directory(lines, file_format="csv", index=None):
+    """Builds groups from a stream of membership edges.
+
+    Each CSV row holds a group name, the kind of member ("user" or "group")
+    and the member's name or id. Each JSONL line holds an object with a
+    "group" key and either a "user" or a "member_group" key. Lines are read
+    one at a time so only the groups themselves are held in memory, and user
+    names are interned so a user in many groups is only stored once.
+
+    Args:
+        lines: An iterable of strs, such as an open file, of the edges
+        file_format: A str of either "csv" or "jsonl"
+        index: A MembershipIndex object to index the groups in once they have
+            all been loaded, or None to not index them
+
+    Returns:
+        groups: A dict of group names and Group objects
+    """
+    if file_format == "csv":
+        edges = _read_csv_edges(lines)
+    elif file_format == "jsonl":
+        edges = _read_jsonl_edges(lines)
+    else:
+        raise ValueError(f"Unknown file format: {file_format}")
+
+    groups = {}
+    for group_name, kind, member in edges:
+        group = groups.get(group_name)
+        if group is None:
+            group = groups[group_name] = Group(group_name)
+
+        if kind == "user":
+            group.add_user(sys.intern(member))
+        elif kind == "group":
+            sub_group = groups.get(member)
+            if sub_group is None:
+                sub_group = groups[member] = Group(member)
+
+            group.add_group(sub_group)
+        else:
+            raise ValueError(f"Unknown member kind: {kind}")
+
+    if index is not None:
+        for group in groups.values():
+            index.add(group)
+
+    return groups
+
+
+def _read_csv_edges(lines):
+    """Reads membership edges from CSV lines, skipping blank lines.
+
+    Args:
+        lines: An iterable of strs each holding a CSV row
+
+    Yields:
+        A list of the group name, the kind of member and the member's name
+    """
+    for row in csv.reader(lines):
+        if any(field.strip() for field in row):
+            yield row
+
+
+def _read_jsonl_edges(lines):
+    """Reads membership edges from JSONL lines.
+
+    Args:
+        lines: An iterable of strs each holding a JSON object
+
+    Yields:
+        A tuple of the group name, the kind of member and the member's name
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+
+        edge = json.loads(line)
+        if "user" in edge:
+            yield edge["group"], "user", edge["user"]
+        else:
+            yield edge["group"], "group", edge["member_group"]
+
+
+def benchmark_load(edge_count, group_count=1000):
+    """Measures the time and memory taken to load a directory.
+
+    Args:
+        edge_count: An int representing the number of edges to load
+        group_count: An int representing the number of groups to spread the
+            edges across
+
+    Returns:
+        results: A dict of file formats and dicts of the seconds taken to load
+            the edges and the peak bytes allocated per edge while loading
+    """
+    results = {}
+    for file_format in ("csv", "jsonl"):
+        lines = _generate_edges(edge_count, group_count, file_format)
+        tracemalloc.start()
+        start = timeit.default_timer()
+        load_directory(lines, file_format)
+        seconds = timeit.default_timer() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[file_format] = {
+            "seconds": seconds,
+            "bytes_per_edge": peak / edge_count,
+        }
+
+    return results
+
+
+def _generate_edges(edge_count, group_count, file_format):
+    """Generates lines of membership edges.
+
+    Every group_count-th edge nests a group in the group before it and every
+    other edge adds one of edge_count // 10 users to a group.
+
+    Args:
+        edge_count: An int representing the number of edges to generate
+        group_count: An int representing the number of groups
+        file_format: A str of either "csv" or "jsonl"
+
+    Yields:
+        A str line for each edge
+    """
+    user_count = max(edge_count // 10, 1)
+    for idx in range(edge_count):
+        group_idx = idx % group_count
+        if idx < group_count and group_idx > 0:
+            edge = (f"group_{group_idx - 1}", "group", f"group_{group_idx}")
+        else:
+            edge = (f"group_{group_idx}", "user", f"user_{idx % user_count}")
+
+        if file_format == "csv":
+            yield ",".join(edge) + "\n"
+        elif edge[1] == "user":
+            yield json.dumps({"group": edge[0], "user": edge[2]}) + "\n"
+        else:
+            yield json.dumps({"group": edge[0], "member_group": edge[2]}) + (
+                "\n"
+            )
+
+
+def benchmark_membership(depth, width, checks):
+    """Times membership checks with and without a membership index.
+
+    Args:
+        depth: An int representing the number of groups in a chain of nested
+            groups
+        width: An int representing the number of subgroups of a single group
+        checks: An int representing the number of checks to time
+
+    Returns:
+        timings: A dict of hierarchy names and dicts of the time in seconds
+            taken by the checks with and without an index
+    """
+    timings = {}
+    for name, build in (("deep", _build_deep), ("wide", _build_wide)):
+        timings[name] = {}
+        for index in (None, MembershipIndex()):
+            root, user = build(depth if name == "deep" else width, index)
+            timer = timeit.Timer(lambda: is_user_in_group(user, root))
+            label = "traversal" if index is None else "index"
+            timings[name][label] = timer.timeit(number=checks)
+
+    return timings
+
+
+def _build_deep(depth, index):
+    """Builds a chain of nested groups with a user at the bottom.
+
+    Args:
+        depth: An int representing the number of groups in the chain
+        index: A MembershipIndex object or None
+
+    Returns:
+        root: A Group object at the top of the chain
+        user: A str representing the user at the bottom of the chain
+    """
+    root = group = Group("group_0", index)
+    for idx in range(1, depth):
+        sub_group = Group(f"group_{idx}")
+        group.add_group(sub_group)
+        group = sub_group
+
+    group.add_user("user")
+
+    return root, "user"
+
+
+def _build_wide(width, index):
+    """Builds a group of many subgroups each with many users.
+
+    Args:
+        width: An int representing the number of subgroups and users in each
+        index: A MembershipIndex object or None
+
+    Returns:
+        root: A Group object containing all of the subgroups
+        user: A str representing the last user of the last subgroup
+    """
+    root = Group("root", index)
+    for idx in range(width):
+        sub_group = Group(f"group_{idx}")
+        for user_idx in range(width):
+            sub_group.add_user(f"user_{idx}_{user_idx}")
+
+        root.add_group(sub_group)
+
+    return root, f"user_{width - 1}_{width - 1}"
+
+
 if __name__ == "__main__":
     main()
@@ -4,6 +4,13 @@ Usage: file_recursion.py
 """
 
 import os
+import re
+import tempfile
+import timeit
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from fnmatch import fnmatch
+
+DEFAULT_EXCLUDED_DIRS = (".git", "node_modules")
 
 
 def main():
@@ -17,6 +24,53 @@ def main():
         "testdir/t1.c",
     ]
 
+    expected_files = sorted(find_files(".c", "testdir"))
+    assert sorted(scan_files(".c", "testdir")) == expected_files
+    assert sorted(scan_files(".c", "testdir", max_workers=4)) == expected_files
+    assert scan_files(".py", "testdir") == []
+
+    assert sorted(iter_files("testdir", suffixes=".c")) == expected_files
+    assert len(list(iter_files("testdir", suffixes=(".c", ".h")))) == 8
+    assert sorted(iter_files("testdir", pattern="a.*")) == [
+        "testdir/subdir1/a.c",
+        "testdir/subdir1/a.h",
+        "testdir/subdir5/a.c",
+        "testdir/subdir5/a.h",
+    ]
+    assert sorted(iter_files("testdir", regex=r"subsub.*\.c$")) == [
+        "testdir/subdir3/subsubdir1/b.c"
+    ]
+    assert sorted(iter_files("testdir", max_depth=0)) == [
+        "testdir/t1.c",
+        "testdir/t1.h",
+    ]
+    assert list(
+        iter_files("testdir", suffixes=".c", exclude_dirs=("subdir*",))
+    ) == ["testdir/t1.c"]
+    assert len(list(iter_files("testdir", limit=3))) == 3
+    assert next(iter_files("testdir", suffixes=".c")) in expected_files
+
+    with tempfile.TemporaryDirectory() as root:
+        os.makedirs(os.path.join(root, "a", ".git"))
+        for name in ("a/x.c", "a/.git/y.c"):
+            with open(os.path.join(root, name), "w"):
+                pass
+
+        os.symlink(root, os.path.join(root, "a", "loop"))
+        assert list(iter_files(root, follow_symlinks=True)) == [
+            os.path.join(root, "a", "x.c")
+        ]
+        assert list(iter_files(root, exclude_dirs=())) != []
+
+        errors = []
+        missing = os.path.join(root, "missing")
+        assert list(iter_files(missing, onerror=errors.append)) == []
+        assert [error.filename for error in errors] == [missing]
+        assert list(iter_files(missing)) == []
+
+    timings = benchmark_find_files(depth=3, width=4, files_per_dir=10)
+    print(f"Find files benchmark (seconds): {timings}")
+
     print("All test cases passed!")
 
 
@@ -43,5 +97,299 @@ def find_files(suffix, path):
     return file_list
 
 
+def iter_files(
+    path,
+    suffixes=None,
+    pattern=None,
+    regex=None,
+    max_depth=None,
+    exclude_dirs=DEFAULT_EXCLUDED_DIRS,
+    follow_symlinks=False,
+    limit=None,
+    onerror=None,
+):
+    """Yield the files beneath path that match every given filter.
+
+    Each match is yielded as soon as its directory entry is read, so the first
+    results arrive without waiting for the rest of the tree and only the
+    directories still to be listed are held in memory. Directories that cannot
+    be listed, such as those without read permission, are skipped like
+    os.walk does.
+
+    Args:
+        path: A str representing the path of the file system
+        suffixes: A str or tuple of strs representing the suffixes of the
+            file names to be found, or None to allow any suffix
+        pattern: A str representing a glob pattern, such as "*.c", that file
+            names must match, or None
+        regex: A str or compiled regular expression that must be found in the
+            paths of the files, or None
+        max_depth: An int representing the number of levels of
+            subdirectories to descend into, or None for no limit
+        exclude_dirs: A tuple of strs representing the names or glob patterns
+            of directories not to descend into
+        follow_symlinks: A bool representing whether to descend into symbolic
+            links to directories, in which case each directory is visited only
+            once so that links back up the tree do not loop forever
+        limit: An int representing the number of files to yield before
+            stopping, or None for no limit
+        onerror: A function called with the OSError of each directory that
+            cannot be listed, which may raise it to stop the search, or None
+            to skip those directories silently
+
+    Yields:
+        A str representing the path of each matching file
+    """
+    if limit is not None and limit <= 0:
+        return
+
+    if isinstance(regex, str):
+        regex = re.compile(regex)
+
+    visited = set()
+    if follow_symlinks:
+        stat = os.stat(path)
+        visited.add((stat.st_dev, stat.st_ino))
+
+    found = 0
+    stack = [(path, 0)]
+    while stack:
+        directory, depth = stack.pop()
+        for entry in _scan_entries(directory, onerror):
+            if entry.is_dir(follow_symlinks=follow_symlinks):
+                if (
+                    max_depth is None or depth < max_depth
+                ) and _should_descend(
+                    entry, exclude_dirs, follow_symlinks, visited
+                ):
+                    stack.append((entry.path, depth + 1))
+            elif entry.is_file() and _matches_file(
+                entry, suffixes, pattern, regex
+            ):
+                yield entry.path
+                found += 1
+                if found == limit:
+                    return
+
+
+def _scan_entries(directory, onerror):
+    """Yield the entries of a directory, skipping it if it cannot be listed.
+
+    Args:
+        directory: A str representing the path of the directory
+        onerror: A function called with the OSError if the directory cannot
+            be listed, or None
+
+    Yields:
+        An os.DirEntry for each entry in the directory
+    """
+    try:
+        entries = os.scandir(directory)
+    except OSError as error:
+        if onerror is not None:
+            onerror(error)
+        return
+
+    with entries:
+        yield from entries
+
+
+def _should_descend(entry, exclude_dirs, follow_symlinks, visited):
+    """Check if iter_files should descend into a directory.
+
+    Args:
+        entry: An os.DirEntry of the directory
+        exclude_dirs: A tuple of strs representing the names or glob patterns
+            of directories not to descend into
+        follow_symlinks: A bool representing whether symbolic links are
+            followed, in which case the directory is recorded as visited
+        visited: A set of (device, inode) tuples of the directories visited
+
+    Returns:
+        A bool representing whether to descend into the directory
+    """
+    if any(fnmatch(entry.name, exclude) for exclude in exclude_dirs):
+        return False
+
+    if follow_symlinks:
+        stat = entry.stat()
+        if (stat.st_dev, stat.st_ino) in visited:
+            return False
+
+        visited.add((stat.st_dev, stat.st_ino))
+
+    return True
+
+
+def _matches_file(entry, suffixes, pattern, regex):
+    """Check if a file matches the filters of iter_files.
+
+    Args:
+        entry: An os.DirEntry of the file
+        suffixes: A str or tuple of strs of allowed suffixes, or None
+        pattern: A str representing a glob pattern for the name, or None
+        regex: A compiled regular expression to find in the path, or None
+
+    Returns:
+        A bool representing whether the file matches every given filter
+    """
+    return (
+        (suffixes is None or entry.name.endswith(suffixes))
+        and (pattern is None or fnmatch(entry.name, pattern))
+        and (regex is None or regex.search(entry.path) is not None)
+    )
+
+
+def scan_files(suffix, path, max_workers=None):
+    """Find all files beneath path with file name suffix using os.scandir.
+
+    Directories are listed with os.scandir, whose entries usually know if they
+    are a file or a directory without another stat call, and are walked with
+    an explicit stack instead of recursion. Given max_workers, directories are
+    listed concurrently by a thread pool, which helps most on network file
+    systems where each listing waits on the server.
+
+    Args:
+        suffix: A str representing the suffix of the file name to be found
+        path: A str representing the path of the file system
+        max_workers: An int representing the number of threads to list
+            directories with, or None to list them one at a time
+
+    Returns:
+        file_list: A list of strs representing paths of files with the given
+            suffix, in no particular order
+    """
+    if max_workers is not None:
+        return _scan_files_threaded(suffix, path, max_workers)
+
+    file_list = []
+    stack = [path]
+    while stack:
+        matches, subdirectories = _scan_directory(suffix, stack.pop())
+        file_list += matches
+        stack += subdirectories
+
+    return file_list
+
+
+def _scan_files_threaded(suffix, path, max_workers):
+    """Find all files beneath path with file name suffix across threads.
+
+    Args:
+        suffix: A str representing the suffix of the file name to be found
+        path: A str representing the path of the file system
+        max_workers: An int representing the number of threads to use
+
+    Returns:
+        file_list: A list of strs representing paths of files with the given
+            suffix, in no particular order
+    """
+    file_list = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(_scan_directory, suffix, path)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                matches, subdirectories = future.result()
+                file_list += matches
+                pending.update(
+                    executor.submit(_scan_directory, suffix, subdirectory)
+                    for subdirectory in subdirectories
+                )
+
+    return file_list
+
+
+def _scan_directory(suffix, path):
+    """List the matching files and the subdirectories of a directory.
+
+    Args:
+        suffix: A str representing the suffix of the file name to be found
+        path: A str representing the path of the directory
+
+    Returns:
+        matches: A list of strs representing paths of files with the given
+            suffix
+        subdirectories: A list of strs representing paths of subdirectories
+    """
+    matches = []
+    subdirectories = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                if entry.name.endswith(suffix):
+                    matches.append(entry.path)
+            elif entry.is_dir():
+                subdirectories.append(entry.path)
+
+    return matches, subdirectories
+
+
+def benchmark_find_files(
+    depth, width, files_per_dir, worker_counts=(2, 8), repeat=3
+):
+    """Times finding files in a generated directory tree.
+
+    Args:
+        depth: An int representing the number of levels of subdirectories
+        width: An int representing the number of subdirectories in each
+            directory above the deepest level
+        files_per_dir: An int representing the number of files in each
+            directory, half of which match the searched suffix
+        worker_counts: A tuple of the numbers of threads to time scan_files
+            with
+        repeat: An int representing the number of times to time each search
+
+    Returns:
+        timings: A dict of the best time in seconds taken by each search
+    """
+    with tempfile.TemporaryDirectory() as root:
+        _make_tree(root, depth, width, files_per_dir)
+        searches = {
+            "find_files": lambda: find_files(".c", root),
+            "scan_files": lambda: scan_files(".c", root),
+        }
+        for workers in worker_counts:
+            searches[f"scan_files_{workers}_threads"] = (
+                lambda workers=workers: scan_files(
+                    ".c", root, max_workers=workers
+                )
+            )
+
+        timings = {}
+        for name, search in searches.items():
+            timings[name] = min(timeit.repeat(search, number=1, repeat=repeat))
+
+    return timings
+
+
+def _make_tree(path, depth, width, files_per_dir):
+    """Create a tree of directories and empty files.
+
+    Args:
+        path: A str representing the path of the directory to fill
+        depth: An int representing the number of levels of subdirectories
+        width: An int representing the number of subdirectories in each
+            directory above the deepest level
+        files_per_dir: An int representing the number of files in each
+            directory
+    """
+    stack = [(path, depth)]
+    while stack:
+        directory, levels = stack.pop()
+        for idx in range(files_per_dir):
+            suffix = ".c" if idx % 2 else ".h"
+            with open(os.path.join(directory, f"file{idx}{suffix}"), "w"):
+                pass
+
+        if levels == 0:
+            continue
+
+        for idx in range(width):
+            subdirectory = os.path.join(directory, f"subdir{idx}")
+            os.mkdir(subdirectory)
+            stack.append((subdirectory, levels - 1))
+
+
 if __name__ == "__main__":
     main()
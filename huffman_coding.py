@@ -5,9 +5,25 @@ Usage: huffman_coding.py
 Classes:
     MinHeap()
     HuffmanNode()
+    HuffmanTree()
+    BitBuffer()
 """
 
+import heapq
+import io
+import mmap
+import pickle
 import sys
+import tempfile
+import timeit
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class MinHeap:
@@ -87,6 +103,8 @@ class HuffmanNode:
         right: A HuffmanNode object under and to the right of this node
     """
 
+    __slots__ = ("char", "freq", "code", "left", "right")
+
     def __init__(self, char=None, freq=1, left=None, right=None):
         """Set-up for the Huffman Node."""
         self.char = char
@@ -96,6 +114,208 @@ class HuffmanNode:
         self.right = right
 
 
+class HuffmanTree:
+    """Creates a compact array-backed Huffman Tree.
+
+    Nodes are int ids indexing into parallel arrays rather than objects, with
+    -1 marking a missing child or an internal node's char. Codes are not
+    stored in the tree.
+
+    Attributes:
+        chars: A list of the distinct chars at the leaves of the tree
+        char_ids: An array of ints representing the index into chars of the
+            char at each node
+        freqs: An array of ints representing the frequency of each node
+        left: An array of ints representing the id of each node's left child
+        right: An array of ints representing the id of each node's right child
+        root: An int representing the id of the root node
+    """
+
+    __slots__ = ("chars", "char_ids", "freqs", "left", "right", "root")
+
+    def __init__(self):
+        """Set-up for the Huffman Tree."""
+        self.chars = []
+        self.char_ids = array("i")
+        self.freqs = array("q")
+        self.left = array("i")
+        self.right = array("i")
+        self.root = -1
+
+    def __len__(self):
+        """The number of nodes in the tree."""
+        return len(self.freqs)
+
+    @classmethod
+    def from_node(cls, root):
+        """Creates a compact tree with the same shape as a tree of nodes.
+
+        Args:
+            root: A HuffmanNode object representing the root node of a Huffman
+                Tree
+
+        Returns:
+            tree: A HuffmanTree object with the same shape as the given tree
+        """
+        tree = cls()
+        tree.root = tree.add_node(root.char, root.freq)
+        stack = [(root, tree.root)]
+        while stack:
+            node, node_id = stack.pop()
+            for branch, child in (
+                (tree.left, node.left),
+                (tree.right, node.right),
+            ):
+                if child is not None:
+                    child_id = tree.add_node(child.char, child.freq)
+                    branch[node_id] = child_id
+                    stack.append((child, child_id))
+
+        return tree
+
+    def add_node(self, char=None, freq=1, left=-1, right=-1):
+        """Add a node to the tree.
+
+        Args:
+            char: The char the node is representing if it is a leaf node
+            freq: An int representing the frequency of the node
+            left: An int representing the id of the node's left child
+            right: An int representing the id of the node's right child
+
+        Returns:
+            node_id: An int representing the id of the added node
+        """
+        if char is None:
+            self.char_ids.append(-1)
+        else:
+            self.char_ids.append(len(self.chars))
+            self.chars.append(char)
+
+        self.freqs.append(freq)
+        self.left.append(left)
+        self.right.append(right)
+        node_id = len(self.freqs) - 1
+
+        return node_id
+
+
+class BitBuffer:
+    """A packed buffer of bits backed by a bytearray.
+
+    Bits are stored most significant bit first. Whole bytes are only written
+    to the bytearray once enough bits have been accumulated, so the buffer is
+    flushed before it is read.
+
+    Attributes:
+        data: A bytearray holding the packed bits, with the final byte padded
+            with zeros once flushed
+        bit_length: An int representing the number of valid bits in the buffer
+    """
+
+    def __init__(self, data=None, bit_length=None):
+        """Set-up for the bit buffer."""
+        self.data = bytearray() if data is None else bytearray(data)
+        if bit_length is None:
+            bit_length = len(self.data) * 8
+
+        self.bit_length = bit_length
+        self._acc = 0
+        self._acc_length = 0
+        self._padding = len(self.data) * 8 - bit_length
+
+    def __len__(self):
+        """The number of valid bits in the buffer."""
+        return self.bit_length
+
+    def __iter__(self):
+        """Iterates over the bits in the buffer as the ints 0 and 1."""
+        self.flush()
+        full_bytes, remainder = divmod(self.bit_length, 8)
+        for byte in memoryview(self.data)[:full_bytes]:
+            yield from _BYTE_BITS[byte]
+
+        if remainder:
+            yield from _BYTE_BITS[self.data[full_bytes]][:remainder]
+
+    def __str__(self):
+        """Represents the buffer as a str of "0" and "1" characters."""
+        self.flush()
+        if self.bit_length == 0:
+            return ""
+
+        bits = format(int.from_bytes(self.data, "big"), "b")
+        return bits.zfill(len(self.data) * 8)[: self.bit_length]
+
+    @classmethod
+    def from_str(cls, bits):
+        """Creates a bit buffer from a str of "0" and "1" characters.
+
+        Args:
+            bits: A str of "0" and "1" characters to pack into the buffer
+
+        Returns:
+            bit_buffer: A BitBuffer object holding the given bits
+        """
+        padding = -len(bits) % 8
+        data = int(bits + "0" * padding or "0", 2).to_bytes(
+            (len(bits) + padding) // 8, "big"
+        )
+        return cls(data, len(bits))
+
+    def view(self):
+        """A read-only memoryview of the packed bytes."""
+        self.flush()
+        return memoryview(self.data).toreadonly()
+
+    def write(self, code, length):
+        """Append bits to the end of the buffer.
+
+        Args:
+            code: An int whose lowest length bits are appended to the buffer
+            length: An int representing the number of bits to append
+        """
+        if self._padding:
+            self._acc = self.data.pop() >> self._padding
+            self._acc_length = 8 - self._padding
+            self._padding = 0
+
+        self._acc = (self._acc << length) | code
+        self._acc_length += length
+        self.bit_length += length
+        if self._acc_length >= 64:
+            self._drain()
+
+    def flush(self):
+        """Write any accumulated bits to data, padding the final byte."""
+        self._drain()
+        if self._acc_length:
+            self._padding = 8 - self._acc_length
+            self.data.append((self._acc << self._padding) & 0xFF)
+            self._acc = 0
+            self._acc_length = 0
+
+    def _drain(self):
+        """Write all whole bytes held in the accumulator to data."""
+        full_bytes, remainder = divmod(self._acc_length, 8)
+        if full_bytes == 0:
+            return
+
+        self.data += (self._acc >> remainder).to_bytes(full_bytes, "big")
+        self._acc &= (1 << remainder) - 1
+        self._acc_length = remainder
+
+
+_BYTE_BITS = [
+    tuple((byte >> shift) & 1 for shift in range(7, -1, -1))
+    for byte in range(256)
+]
+
+
+MAX_TABLE_ENTRIES = 1 << 16
+DEFAULT_BLOCK_SIZE = 1 << 20
+_PACK_CHUNK_CHARS = 1 << 16
+
+
 def main():
     """Main function call.
 
@@ -124,6 +344,123 @@ def main():
     )
     assert a_great_sentence == decoded_data
 
+    packed_data, root = huffman_encoding_packed(a_great_sentence)
+    assert len(packed_data) == len(encoded_data)
+    assert str(packed_data) == encoded_data
+    assert len(packed_data.view()) == (len(encoded_data) + 7) // 8
+    assert huffman_decoding(packed_data, root) == a_great_sentence
+    assert str(BitBuffer.from_str(encoded_data)) == encoded_data
+
+    for table_bits in (1, 2, 4, 8):
+        table = build_decoding_table(root, table_bits)
+        assert huffman_table_decoding(packed_data, root, table) == (
+            a_great_sentence
+        )
+    assert huffman_table_decoding(encoded_data, root) == a_great_sentence
+    decoded_data = huffman_table_decoding(
+        encoded_data, root, length=len(a_great_sentence)
+    )
+    assert decoded_data == a_great_sentence
+
+    code_lengths = get_code_lengths(root)
+    canonical_codes = get_canonical_codes(code_lengths)
+    assert {char: len(code) for char, code in canonical_codes.items()} == (
+        code_lengths
+    )
+    header = serialize_header(code_lengths)
+    assert parse_header(header) == (code_lengths, len(header))
+    header_size = len(header)
+    pickled_tree_size = len(pickle.dumps(root))
+    print(f"The size of the canonical header is: {header_size}")
+    print(f"The size of the pickled Huffman Tree is: {pickled_tree_size}\n")
+    assert header_size * 10 < pickled_tree_size
+
+    compressed_data = huffman_compress(a_great_sentence)
+    assert huffman_decompress(compressed_data) == a_great_sentence
+    assert huffman_decompress(huffman_compress("aaa")) == "aaa"
+    assert huffman_decompress(huffman_compress("")) == ""
+
+    stream_data = a_great_sentence.encode() * 50
+    with tempfile.TemporaryFile() as compressed_file:
+        huffman_compress_stream(
+            io.BytesIO(stream_data), compressed_file, block_size=64
+        )
+        compressed_file.flush()
+        with mmap.mmap(
+            compressed_file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as compressed_map:
+            decompressed_stream = io.BytesIO()
+            huffman_decompress_stream(compressed_map, decompressed_stream)
+    assert decompressed_stream.getvalue() == stream_data
+
+    parallel_data = huffman_compress_parallel(
+        stream_data, block_size=64, max_workers=2
+    )
+    assert huffman_decompress_parallel(parallel_data, max_workers=2) == (
+        stream_data
+    )
+    assert huffman_decompress_block(parallel_data, 3) == stream_data[192:256]
+
+    skewed_data = "".join(
+        chr(ord("a") + idx) * freq
+        for idx, freq in enumerate([1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89])
+    )
+    skewed_root = build_huffman_tree_linear(skewed_data)
+    assert max(get_code_lengths(skewed_root).values()) == 10
+    limited_lengths = get_code_lengths(skewed_root, max_code_length=5)
+    assert max(limited_lengths.values()) == 5
+    assert sum(2**-length for length in limited_lengths.values()) <= 1
+    assert huffman_decompress(huffman_compress(skewed_data, 5)) == skewed_data
+
+    deep_root = HuffmanNode("0")
+    for idx in range(1, sys.getrecursionlimit() * 2):
+        deep_root = HuffmanNode(left=HuffmanNode(str(idx)), right=deep_root)
+    assert len(get_huffman_codes(deep_root, {})) == idx + 1
+
+    compact_tree = build_huffman_tree(a_great_sentence, compact=True)
+    assert len(compact_tree) == 2 * len(set(a_great_sentence)) - 1
+    assert huffman_decoding(packed_data, compact_tree) == a_great_sentence
+    assert huffman_table_decoding(packed_data, compact_tree) == (
+        a_great_sentence
+    )
+    compact_tree = build_huffman_tree_linear(skewed_data, compact=True)
+    skewed_codes = get_huffman_codes(skewed_root, {})
+    packed_skewed_data = pack_data(skewed_data, skewed_codes)
+    assert huffman_decoding(packed_skewed_data, compact_tree) == skewed_data
+    assert sorted(compact_tree.freqs) == sorted(
+        HuffmanTree.from_node(skewed_root).freqs
+    )
+    for table_bits in (1, 4, 8):
+        table = build_decoding_table(compact_tree, table_bits)
+        assert table == build_decoding_table(skewed_root, table_bits)
+        decoded_data = huffman_table_decoding(
+            packed_skewed_data, compact_tree, table
+        )
+        assert decoded_data == skewed_data
+
+    frequencies = count_frequencies(a_great_sentence)
+    assert count_frequencies(a_great_sentence.encode()) == frequencies
+    reused_root = build_huffman_tree(None, frequencies=frequencies)
+    assert get_huffman_codes(reused_root, {}) == get_huffman_codes(root, {})
+
+    byte_data = bytes([0, 97, 98, 99, 97, 98, 255])
+    encoded_bytes, bytes_root = huffman_encoding(byte_data)
+    decoded_bytes = huffman_decoding(encoded_bytes, bytes_root)
+    assert decoded_bytes.encode("latin-1") == byte_data
+    packed_bytes, bytes_root = huffman_encoding_packed(bytearray(byte_data))
+    assert str(packed_bytes) == encoded_bytes
+    decoded_bytes = huffman_table_decoding(packed_bytes, bytes_root)
+    assert decoded_bytes.encode("latin-1") == byte_data
+    decompressed_bytes = huffman_decompress(huffman_compress(byte_data))
+    assert decompressed_bytes.encode("latin-1") == byte_data
+
+    timings = benchmark_encoding(a_great_sentence * 5000, repeat=3)
+    print(f"Encoding benchmark (seconds): {timings}\n")
+    timings = benchmark_decoding(a_great_sentence * 5000, repeat=3)
+    print(f"Decoding benchmark (seconds): {timings}\n")
+    timings = benchmark_tree_build(stream_data * 20, repeat=3)
+    print(f"Tree build benchmark (seconds): {timings}\n")
+
     print("All test cases passed!")
 
 
@@ -131,7 +468,8 @@ def huffman_encoding(data):
     """Encodes data using Huffman Coding compression algorithm.
 
     Args:
-        data: A str to be encoded
+        data: A str or bytes-like object to be encoded, with each byte
+            encoded as the latin-1 char with the same value
 
     Returns:
         encoded_data: A str representing the data encoded into binary using the
@@ -140,49 +478,215 @@ def huffman_encoding(data):
     """
     root = build_huffman_tree(data)
     huffman_codes = get_huffman_codes(root, {})
-
-    encoded_data = ""
-    for char in data:
-        encoded_data += huffman_codes[char]
+    encoded_data = "".join(map(huffman_codes.__getitem__, _as_text(data)))
 
     return encoded_data, root
 
 
-def build_huffman_tree(data):
+def huffman_encoding_packed(data):
+    """Encodes data into a packed bit buffer using Huffman Coding.
+
+    Args:
+        data: A str or bytes-like object to be encoded, with each byte
+            encoded as the latin-1 char with the same value
+
+    Returns:
+        packed_data: A BitBuffer object holding the data encoded using the
+            Huffman Coding compression algorithm
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+    """
+    root = build_huffman_tree(data)
+    huffman_codes = get_huffman_codes(root, {})
+    packed_data = pack_data(_as_text(data), huffman_codes)
+
+    return packed_data, root
+
+
+def pack_data(data, huffman_codes):
+    """Writes the Huffman Code of each char in data into a bit buffer.
+
+    The codes of each chunk of chars are joined into a single str and parsed
+    as one int, so the bits are packed in bulk rather than one char at a time.
+
+    Args:
+        data: A str to be encoded
+        huffman_codes: A dict of chars and their cooresponding Huffman Codes
+
+    Returns:
+        packed_data: A BitBuffer object holding the encoded data
+    """
+    get_code = huffman_codes.__getitem__
+    packed_data = BitBuffer()
+    for start in range(0, len(data), _PACK_CHUNK_CHARS):
+        bits = "".join(map(get_code, data[start : start + _PACK_CHUNK_CHARS]))
+        if bits:
+            packed_data.write(int(bits, 2), len(bits))
+
+    packed_data.flush()
+
+    return packed_data
+
+
+def build_huffman_tree(data, compact=False, frequencies=None):
     """Builds a Huffman Tree from the provided data.
 
     Args:
-        data: A str to use to build the Huffman Tree
+        data: A str or bytes-like object to use to build the Huffman Tree,
+            which is ignored if frequencies is given
+        compact: A boolean representing whether to return a HuffmanTree object
+        frequencies: A dict of chars and their int frequencies to build the
+            Huffman Tree from instead of counting the chars in data
 
     Returns:
         root: A HuffmanNode object representing the root node of a Huffman Tree
+            or a HuffmanTree object if compact is True
     """
-    data_freq = {}
-    for char in data:
-        if char in data_freq:
-            data_freq[char].freq += 1
-        else:
-            data_freq[char] = HuffmanNode(char)
+    if frequencies is None:
+        frequencies = count_frequencies(data)
+
+    tree = HuffmanTree() if compact else None
+    new_node = HuffmanNode if tree is None else tree.add_node
 
     min_heap = MinHeap()
     entry_id = 0
-    for char in data_freq:
-        node = data_freq[char]
-        min_heap.push((node.freq, entry_id, node))
+    for char, freq in frequencies.items():
+        node = new_node(char, freq)
+        min_heap.push((freq, entry_id, node))
         entry_id += 1
 
     while len(min_heap.heap) > 1:
         freq1, _, node1 = min_heap.pop()
         freq2, _, node2 = min_heap.pop()
-        node = HuffmanNode(freq=freq1 + freq2, left=node1, right=node2)
-        min_heap.push((node.freq, entry_id, node))
+        node = new_node(freq=freq1 + freq2, left=node1, right=node2)
+        min_heap.push((freq1 + freq2, entry_id, node))
         entry_id += 1
 
+    if tree is not None:
+        tree.root = node
+        return tree
+
     root = node
 
     return root
 
 
+def build_huffman_tree_linear(data, compact=False, frequencies=None):
+    """Builds a Huffman Tree from the provided data without a heap.
+
+    The leaves are sorted by frequency once and then merged in linear time by
+    build_huffman_tree_sorted. Equal frequencies may be paired differently
+    than in build_huffman_tree, so the codes themselves can differ. A compact
+    tree is built directly in its arrays without creating any HuffmanNodes.
+
+    Args:
+        data: A str or bytes-like object to use to build the Huffman Tree,
+            which is ignored if frequencies is given
+        compact: A boolean representing whether to return a HuffmanTree object
+        frequencies: A dict of chars and their int frequencies to build the
+            Huffman Tree from instead of counting the chars in data
+
+    Returns:
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+            or a HuffmanTree object if compact is True
+    """
+    if frequencies is None:
+        frequencies = count_frequencies(data)
+
+    items = sorted(frequencies.items(), key=lambda item: item[1])
+    if compact:
+        tree = HuffmanTree()
+        leaves = [tree.add_node(char, freq) for char, freq in items]
+        tree.root = build_huffman_tree_sorted(leaves, tree)
+        return tree
+
+    root = build_huffman_tree_sorted(
+        [HuffmanNode(char, freq) for char, freq in items]
+    )
+
+    return root
+
+
+def count_frequencies(data):
+    """Counts the number of times each char appears in data.
+
+    Bytes-like data is counted with numpy when it is installed, and each byte
+    is counted as the latin-1 char with the same value.
+
+    Args:
+        data: A str or bytes-like object to count the chars of
+
+    Returns:
+        frequencies: A dict of chars and their int frequencies, in order of
+            first appearance for a str
+    """
+    if isinstance(data, str):
+        return dict(Counter(data))
+
+    data = memoryview(data).cast("B")
+    if numpy is not None:
+        byte_counts = numpy.bincount(
+            numpy.frombuffer(data, dtype=numpy.uint8), minlength=256
+        ).tolist()
+    else:
+        counter = Counter(data)
+        byte_counts = [counter[byte] for byte in range(256)]
+
+    frequencies = {
+        chr(byte): count for byte, count in enumerate(byte_counts) if count
+    }
+
+    return frequencies
+
+
+def build_huffman_tree_sorted(leaves, tree=None):
+    """Builds a Huffman Tree in linear time from leaves sorted by frequency.
+
+    Merged nodes are created in order of increasing frequency, so they are
+    kept in a second queue rather than a heap and the two smallest nodes are
+    always at the front of one of the two queues. Ties are broken in favor of
+    the leaves.
+
+    Args:
+        leaves: A list of HuffmanNode objects, or of node ids in tree, sorted
+            by frequency
+        tree: A HuffmanTree object holding the leaves, which merged nodes are
+            added to, or None if the leaves are HuffmanNode objects
+
+    Returns:
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+            or the int id of the root node in tree
+    """
+    if tree is None:
+        new_node = HuffmanNode
+
+        def freq(node):
+            return node.freq
+
+    else:
+        new_node = tree.add_node
+        freq = tree.freqs.__getitem__
+
+    leaves = deque(leaves)
+    merged = deque()
+
+    def pop_smallest():
+        if not merged or (leaves and freq(leaves[0]) <= freq(merged[0])):
+            return leaves.popleft()
+
+        return merged.popleft()
+
+    while len(leaves) + len(merged) > 1:
+        node1 = pop_smallest()
+        node2 = pop_smallest()
+        merged.append(
+            new_node(freq=freq(node1) + freq(node2), left=node1, right=node2)
+        )
+
+    root = (leaves or merged)[0]
+
+    return root
+
+
 def get_huffman_codes(node, huffman_codes):
     """Creates a dict of chars and their cooresponding Huffman Codes.
 
@@ -195,33 +699,572 @@ def get_huffman_codes(node, huffman_codes):
         huffman_codes: A dict containing all of the generated Huffman Codes
             thus far
     """
-    if node.char is not None:
-        huffman_codes[node.char] = node.code
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.char is not None:
+            huffman_codes[node.char] = node.code
 
-    if node.left is not None:
-        node.left.code = node.code + "0"
-        get_huffman_codes(node.left, huffman_codes)
+        if node.right is not None:
+            node.right.code = node.code + "1"
+            stack.append(node.right)
 
-    if node.right is not None:
-        node.right.code = node.code + "1"
-        get_huffman_codes(node.right, huffman_codes)
+        if node.left is not None:
+            node.left.code = node.code + "0"
+            stack.append(node.left)
 
     return huffman_codes
 
 
+def get_frequencies(root):
+    """Creates a dict of chars and their frequencies from a Huffman Tree.
+
+    Args:
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+
+    Returns:
+        frequencies: A dict of chars and the int frequencies of the leaves
+    """
+    frequencies = {}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.char is not None:
+            frequencies[node.char] = node.freq
+
+        for child in (node.right, node.left):
+            if child is not None:
+                stack.append(child)
+
+    return frequencies
+
+
+def limit_code_lengths(frequencies, max_code_length):
+    """Finds optimal code lengths no longer than max_code_length.
+
+    Uses the package-merge algorithm: each round pairs up the cheapest items
+    into packages and merges them back in with the original chars. A char's
+    code length is the number of times it appears in the 2n - 2 cheapest items
+    of the final round.
+
+    Args:
+        frequencies: A dict of chars and their int frequencies
+        max_code_length: An int representing the longest allowed code length
+
+    Returns:
+        code_lengths: A dict of chars and the int lengths of their codes
+    """
+    if len(frequencies) <= 1:
+        return dict.fromkeys(frequencies, 1)
+
+    if len(frequencies) > 1 << max_code_length:
+        raise ValueError(
+            f"{len(frequencies)} chars cannot have codes of at most "
+            f"{max_code_length} bits"
+        )
+
+    leaves = sorted(
+        ((freq, (char,)) for char, freq in frequencies.items()),
+        key=lambda item: item[0],
+    )
+    items = leaves
+    for _ in range(max_code_length - 1):
+        packages = [
+            (
+                items[idx][0] + items[idx + 1][0],
+                items[idx][1] + items[idx + 1][1],
+            )
+            for idx in range(0, len(items) - 1, 2)
+        ]
+        items = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+
+    code_lengths = dict.fromkeys(frequencies, 0)
+    for _, chars in items[: 2 * len(frequencies) - 2]:
+        for char in chars:
+            code_lengths[char] += 1
+
+    return code_lengths
+
+
+def get_code_lengths(root, max_code_length=None):
+    """Creates a dict of chars and the lengths of their Huffman Codes.
+
+    A tree made up of a single leaf is given a code length of 1 so that every
+    char is represented by at least one bit.
+
+    Args:
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+        max_code_length: An int representing the longest allowed code length,
+            or None for no limit
+
+    Returns:
+        code_lengths: A dict of chars and the int lengths of their codes
+    """
+    huffman_codes = get_huffman_codes(root, {})
+    code_lengths = {
+        char: max(len(code), 1) for char, code in huffman_codes.items()
+    }
+
+    if max_code_length is not None and (
+        max(code_lengths.values()) > max_code_length
+    ):
+        code_lengths = limit_code_lengths(
+            get_frequencies(root), max_code_length
+        )
+
+    return code_lengths
+
+
+def get_canonical_codes(code_lengths):
+    """Creates a dict of chars and their canonical Huffman Codes.
+
+    Canonical codes are assigned in order of code length and then char, with
+    each code being one more than the previous code shifted left to the new
+    length. The codes can therefore be rebuilt from the code lengths alone.
+
+    Args:
+        code_lengths: A dict of chars and the int lengths of their codes
+
+    Returns:
+        canonical_codes: A dict of chars and their canonical Huffman Codes
+    """
+    canonical_codes = {}
+    code = 0
+    prev_length = 0
+    for char, length in sorted(
+        code_lengths.items(), key=lambda item: (item[1], item[0])
+    ):
+        code <<= length - prev_length
+        canonical_codes[char] = format(code, f"0{length}b")
+        code += 1
+        prev_length = length
+
+    return canonical_codes
+
+
+def build_canonical_tree(code_lengths):
+    """Builds a Huffman Tree from canonical code lengths.
+
+    Args:
+        code_lengths: A dict of chars and the int lengths of their codes
+
+    Returns:
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+            for the canonical codes
+    """
+    root = HuffmanNode()
+    for char, code in get_canonical_codes(code_lengths).items():
+        node = root
+        for bit in code:
+            branch = "right" if bit == "1" else "left"
+            if getattr(node, branch) is None:
+                setattr(node, branch, HuffmanNode())
+
+            node = getattr(node, branch)
+
+        node.char = char
+        node.code = code
+
+    return root
+
+
+def serialize_header(code_lengths):
+    """Serializes code lengths into a compact header.
+
+    The header holds the longest code length, then the number of codes of each
+    length and then the code point of each char in canonical order, all as
+    variable length ints.
+
+    Args:
+        code_lengths: A dict of chars and the int lengths of their codes
+
+    Returns:
+        header: A bytes object holding the serialized code lengths
+    """
+    max_length = max(code_lengths.values(), default=0)
+    length_counts = [0] * (max_length + 1)
+    for length in code_lengths.values():
+        length_counts[length] += 1
+
+    header = bytearray()
+    _write_varint(header, max_length)
+    for count in length_counts[1:]:
+        _write_varint(header, count)
+
+    for char, _ in sorted(
+        code_lengths.items(), key=lambda item: (item[1], item[0])
+    ):
+        _write_varint(header, ord(char))
+
+    return bytes(header)
+
+
+def parse_header(data, offset=0):
+    """Parses code lengths from a header created by serialize_header.
+
+    Args:
+        data: A bytes-like object holding the serialized header
+        offset: An int representing the position of the header in data
+
+    Returns:
+        code_lengths: A dict of chars and the int lengths of their codes
+        offset: An int representing the position just past the header
+    """
+    max_length, offset = _read_varint(data, offset)
+    length_counts = []
+    for _ in range(max_length):
+        count, offset = _read_varint(data, offset)
+        length_counts.append(count)
+
+    code_lengths = {}
+    for length, count in enumerate(length_counts, start=1):
+        for _ in range(count):
+            code_point, offset = _read_varint(data, offset)
+            code_lengths[chr(code_point)] = length
+
+    return code_lengths, offset
+
+
+def huffman_compress(data, max_code_length=None):
+    """Compresses data into a self contained bytes object.
+
+    The compressed data holds a canonical code header, the number of encoded
+    bits, the number of chars and then the packed encoded data, so it can be
+    decoded without the Huffman Tree used to encode it.
+
+    Args:
+        data: A str or bytes-like object to be compressed, with each byte
+            compressed as the latin-1 char with the same value
+        max_code_length: An int representing the longest allowed code length,
+            or None for no limit
+
+    Returns:
+        compressed_data: A bytes object holding the compressed data
+    """
+    code_lengths = {}
+    if data:
+        root = build_huffman_tree_linear(data)
+        code_lengths = get_code_lengths(root, max_code_length)
+
+    data = _as_text(data)
+    packed_data = pack_data(data, get_canonical_codes(code_lengths))
+
+    compressed_data = bytearray(serialize_header(code_lengths))
+    _write_varint(compressed_data, len(packed_data))
+    _write_varint(compressed_data, len(data))
+    compressed_data += packed_data.view()
+
+    return bytes(compressed_data)
+
+
+def huffman_decompress(data):
+    """Decompresses data created by huffman_compress.
+
+    Args:
+        data: A bytes-like object holding the compressed data
+
+    Returns:
+        decompressed_data: A str of the original data
+    """
+    code_lengths, offset = parse_header(data)
+    bit_length, offset = _read_varint(data, offset)
+    char_length, offset = _read_varint(data, offset)
+    if bit_length == 0:
+        return ""
+
+    root = build_canonical_tree(code_lengths)
+    packed_data = BitBuffer(data[offset:], bit_length)
+    decompressed_data = huffman_table_decoding(
+        packed_data, root, length=char_length
+    )
+
+    return decompressed_data
+
+
+def huffman_compress_stream(
+    input_stream, output_stream, block_size=DEFAULT_BLOCK_SIZE
+):
+    """Compresses a binary stream one block at a time.
+
+    Each block of at most block_size bytes is compressed independently with
+    its own canonical code header, so only one block is held in memory at a
+    time. Every block is written as its compressed length followed by the
+    output of huffman_compress, and the stream ends with a length of zero.
+
+    Args:
+        input_stream: A binary file-like object to read the data from
+        output_stream: A binary file-like object to write the compressed data
+        block_size: An int representing the max number of bytes per block
+    """
+    while True:
+        block = input_stream.read(block_size)
+        if not block:
+            break
+
+        compressed_block = _compress_block(block)
+        output_stream.write(_encode_varint(len(compressed_block)))
+        output_stream.write(compressed_block)
+
+    output_stream.write(_encode_varint(0))
+
+
+def huffman_decompress_stream(input_stream, output_stream):
+    """Decompresses a stream created by huffman_compress_stream.
+
+    Args:
+        input_stream: A binary file-like object or mmap object to read the
+            compressed data from
+        output_stream: A binary file-like object to write the decompressed data
+    """
+    while True:
+        block_length = _read_stream_varint(input_stream)
+        if block_length == 0:
+            break
+
+        compressed_block = input_stream.read(block_length)
+        if len(compressed_block) < block_length:
+            raise ValueError("Compressed stream ended part way into a block")
+
+        output_stream.write(_decompress_block(compressed_block))
+
+
+def huffman_compress_parallel(
+    data, block_size=DEFAULT_BLOCK_SIZE, max_workers=None
+):
+    """Compresses bytes as independent blocks across a process pool.
+
+    The compressed data starts with a block index holding the block size, the
+    number of blocks and the compressed length of each block, followed by the
+    output of huffman_compress for each block.
+
+    Args:
+        data: A bytes-like object to be compressed
+        block_size: An int representing the number of bytes per block
+        max_workers: An int representing the max number of processes to use,
+            defaulting to the number of processors on the machine
+
+    Returns:
+        compressed_data: A bytes object holding the block index and blocks
+    """
+    data = memoryview(data).cast("B")
+    blocks = [
+        bytes(data[start : start + block_size])
+        for start in range(0, len(data), block_size)
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        compressed_blocks = list(executor.map(_compress_block, blocks))
+
+    compressed_data = bytearray()
+    _write_varint(compressed_data, block_size)
+    _write_varint(compressed_data, len(compressed_blocks))
+    for compressed_block in compressed_blocks:
+        _write_varint(compressed_data, len(compressed_block))
+
+    for compressed_block in compressed_blocks:
+        compressed_data += compressed_block
+
+    return bytes(compressed_data)
+
+
+def huffman_decompress_parallel(data, max_workers=None):
+    """Decompresses data created by huffman_compress_parallel.
+
+    Args:
+        data: A bytes-like object holding the compressed data
+        max_workers: An int representing the max number of processes to use,
+            defaulting to the number of processors on the machine
+
+    Returns:
+        decompressed_data: A bytes object of the original data
+    """
+    _, block_offsets = read_block_index(data)
+    blocks = [bytes(data[start:end]) for start, end in block_offsets]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        decompressed_data = b"".join(executor.map(_decompress_block, blocks))
+
+    return decompressed_data
+
+
+def huffman_decompress_block(data, block_idx):
+    """Decompresses one block of data created by huffman_compress_parallel.
+
+    Args:
+        data: A bytes-like object holding the compressed data
+        block_idx: An int representing the index of the block to decompress
+
+    Returns:
+        block: A bytes object of the original data in the block, which starts
+            at block_idx * block_size in the original data
+    """
+    _, block_offsets = read_block_index(data)
+    start, end = block_offsets[block_idx]
+
+    return _decompress_block(data[start:end])
+
+
+def read_block_index(data):
+    """Reads the block index of data created by huffman_compress_parallel.
+
+    Args:
+        data: A bytes-like object holding the compressed data
+
+    Returns:
+        block_size: An int representing the number of bytes per block
+        block_offsets: A list of tuples of the start and end positions of each
+            compressed block in data
+    """
+    block_size, offset = _read_varint(data, 0)
+    block_count, offset = _read_varint(data, offset)
+    block_lengths = []
+    for _ in range(block_count):
+        block_length, offset = _read_varint(data, offset)
+        block_lengths.append(block_length)
+
+    block_offsets = []
+    for block_length in block_lengths:
+        block_offsets.append((offset, offset + block_length))
+        offset += block_length
+
+    return block_size, block_offsets
+
+
+def _compress_block(block):
+    """Compresses a block of bytes with huffman_compress.
+
+    Args:
+        block: A bytes object to be compressed
+
+    Returns:
+        A bytes object holding the compressed block
+    """
+    return huffman_compress(block.decode("latin-1"))
+
+
+def _decompress_block(compressed_block):
+    """Decompresses a block of bytes compressed by _compress_block.
+
+    Args:
+        compressed_block: A bytes-like object holding the compressed block
+
+    Returns:
+        A bytes object of the original block
+    """
+    return huffman_decompress(compressed_block).encode("latin-1")
+
+
+def _as_text(data):
+    """Converts bytes-like data into the str of its latin-1 chars.
+
+    The trees are built from counts of latin-1 chars for bytes-like data, so
+    the data has to be looked up in the codes by the same chars.
+
+    Args:
+        data: A str or bytes-like object
+
+    Returns:
+        A str of the data, with each byte as the latin-1 char of its value
+    """
+    if isinstance(data, str):
+        return data
+
+    return str(memoryview(data).cast("B"), "latin-1")
+
+
+def _encode_varint(value):
+    """Encodes an unsigned int using 7 bits per byte.
+
+    Args:
+        value: An int greater than or equal to 0 to encode
+
+    Returns:
+        A bytes object holding the encoded int
+    """
+    data = bytearray()
+    _write_varint(data, value)
+
+    return bytes(data)
+
+
+def _read_stream_varint(stream):
+    """Reads an unsigned int written by _write_varint from a stream.
+
+    Args:
+        stream: A binary file-like object to read the int from
+
+    Returns:
+        value: The int that was read
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = stream.read(1)
+        if not byte:
+            raise ValueError("Compressed stream ended part way into a length")
+
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return value
+
+        shift += 7
+
+
+def _write_varint(data, value):
+    """Appends an unsigned int to data using 7 bits per byte.
+
+    Args:
+        data: A bytearray to append the int to
+        value: An int greater than or equal to 0 to append
+    """
+    while value > 0x7F:
+        data.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    data.append(value)
+
+
+def _read_varint(data, offset):
+    """Reads an unsigned int written by _write_varint.
+
+    Args:
+        data: A bytes-like object to read the int from
+        offset: An int representing the position of the int in data
+
+    Returns:
+        value: The int that was read
+        offset: An int representing the position just past the int
+    """
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+
+        shift += 7
+
+
 def huffman_decoding(data, root):
     """Decodes data using Huffman Coding compression algorithm.
 
     Args:
-        data: A str in binary to be encoded using the provided Huffman Tree
+        data: A str in binary or a BitBuffer object to be decoded using the
+            provided Huffman Tree
         root: A HuffmanNode object representing the root node of a Huffman Tree
-            to be used to decode the provided data
+            or a HuffmanTree object to be used to decode the provided data
 
     Returns:
         decoded_data: A str representing the data decoded using the Huffman
             Coding compression algorithm
     """
-    decoded_data = ""
+    if not isinstance(data, str):
+        data = str(data)
+
+    if isinstance(root, HuffmanTree):
+        return _compact_tree_decoding(data, root)
+
+    decoded_data = []
     node = root
     for bit in data:
         if bit == "0":
@@ -230,11 +1273,386 @@ def huffman_decoding(data, root):
             node = node.right
 
         if node.char is not None:
-            decoded_data += node.char
+            decoded_data.append(node.char)
+            node = root
+
+    return "".join(decoded_data)
+
+
+def _compact_tree_decoding(data, tree):
+    """Decodes data by walking a compact Huffman Tree one bit at a time.
+
+    Args:
+        data: A str in binary to be decoded using the provided Huffman Tree
+        tree: A HuffmanTree object to be used to decode the provided data
+
+    Returns:
+        decoded_data: A str representing the decoded data
+    """
+    chars, char_ids = tree.chars, tree.char_ids
+    left, right, root = tree.left, tree.right, tree.root
+
+    decoded_data = []
+    node_id = root
+    for bit in data:
+        node_id = left[node_id] if bit == "0" else right[node_id]
+        char_id = char_ids[node_id]
+        if char_id >= 0:
+            decoded_data.append(chars[char_id])
+            node_id = root
+
+    return "".join(decoded_data)
+
+
+def build_decoding_table(root, table_bits=None):
+    """Builds a lookup table to decode table_bits bits at a time.
+
+    Every internal node of the tree is a decoding state, numbered in the order
+    returned by _internal_nodes with the root as state 0. The table holds a
+    row for each state, and each entry of a row is indexed by the next
+    table_bits bits of the encoded data and holds every char whose code is
+    completed by those bits along with the state the walk ends in. A final
+    row for a state that is never left marks an invalid code.
+
+    Args:
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+            or a HuffmanTree object
+        table_bits: An int of 1, 2, 4 or 8 representing the number of bits to
+            index the table by, or None to use the most bits for which the
+            table has at most MAX_TABLE_ENTRIES entries
+
+    Returns:
+        table: A list of rows, each a list of 2 ** table_bits tuples holding a
+            str of the decoded chars and an int representing the next state
+    """
+    if table_bits not in (None, 1, 2, 4, 8):
+        raise ValueError("table_bits must be 1, 2, 4 or 8")
+
+    accessors = _tree_accessors(root)
+    root, get_child, get_char = accessors
+    nodes = _internal_nodes(accessors)
+    if table_bits is None:
+        table_bits = 1
+        for bits in (8, 4, 2):
+            if (len(nodes) + 1) << bits <= MAX_TABLE_ENTRIES:
+                table_bits = bits
+                break
+    states = {node: state for state, node in enumerate(nodes)}
+    error_state = len(nodes)
+
+    table = []
+    for node in nodes:
+        entries = [("", node)]
+        for _ in range(table_bits):
+            next_entries = []
+            for chars, node in entries:
+                for bit in (0, 1):
+                    child = None if node is None else get_child(node, bit)
+                    char = None if child is None else get_char(child)
+                    if char is None:
+                        next_entries.append((chars, child))
+                    else:
+                        next_entries.append((chars + char, root))
+
+            entries = next_entries
+
+        table.append(
+            [
+                (chars, error_state if node is None else states[node])
+                for chars, node in entries
+            ]
+        )
+
+    table.append([("", error_state)] * (1 << table_bits))
+
+    return table
+
+
+def huffman_table_decoding(data, root, table=None, length=None):
+    """Decodes data several bits at a time using a precomputed lookup table.
+
+    Each lookup takes the current state and the next table_bits bits and
+    gives the decoded chars and the next state, so whole bytes are decoded
+    without walking the tree. Only the bits of a final partial byte are
+    decoded by walking the tree.
+
+    Args:
+        data: A str in binary or a BitBuffer object to be decoded using the
+            provided Huffman Tree
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+            or a HuffmanTree object to be used to decode the provided data
+        table: A list built by build_decoding_table from the given root, built
+            with the default number of bits if not provided
+        length: An int representing the number of chars encoded in the data,
+            which the decoded chars are checked against, or None if unknown
+
+    Returns:
+        decoded_data: A str representing the data decoded using the Huffman
+            Coding compression algorithm
+
+    Raises:
+        ValueError: If the data holds a code that is not in the tree or does
+            not decode to length chars
+    """
+    if isinstance(data, str):
+        data = BitBuffer.from_str(data)
+
+    data_root = root
+    accessors = _tree_accessors(root)
+    root, get_child, get_char = accessors
+    if get_char(root) is not None:
+        return ""
+
+    if table is None:
+        table = build_decoding_table(data_root)
+
+    nodes = _internal_nodes(accessors)
+    full_bytes, remainder = divmod(len(data), 8)
+    packed = data.view()
+
+    decoded_data = []
+    state = _decode_bytes(packed[:full_bytes], table, decoded_data)
+    if state == len(nodes):
+        raise ValueError("Invalid Huffman Code")
+
+    node = nodes[state]
+    for shift in range(7, 7 - remainder, -1):
+        node = get_child(node, (packed[full_bytes] >> shift) & 1)
+        if node is None:
+            raise ValueError("Invalid Huffman Code")
+
+        char = get_char(node)
+        if char is not None:
+            decoded_data.append(char)
             node = root
 
+    decoded_data = "".join(decoded_data)
+    if length is not None and len(decoded_data) != length:
+        raise ValueError(
+            f"Decoded {len(decoded_data)} chars instead of {length}"
+        )
+
     return decoded_data
 
 
+def _decode_bytes(packed, table, decoded_data):
+    """Decodes whole bytes with a table built by build_decoding_table.
+
+    Args:
+        packed: A bytes-like object holding the bytes to decode
+        table: A list built by build_decoding_table
+        decoded_data: A list the decoded strs are appended to
+
+    Returns:
+        state: An int representing the state the decoding ended in
+    """
+    append = decoded_data.append
+    table_bits = len(table[0]).bit_length() - 1
+    state = 0
+    if table_bits == 8:
+        for byte in packed:
+            chars, state = table[state][byte]
+            append(chars)
+
+        return state
+
+    mask = (1 << table_bits) - 1
+    shifts = range(8 - table_bits, -1, -table_bits)
+    for byte in packed:
+        for shift in shifts:
+            chars, state = table[state][(byte >> shift) & mask]
+            append(chars)
+
+    return state
+
+
+def _internal_nodes(accessors):
+    """Lists the internal nodes of a Huffman Tree, starting with the root.
+
+    Args:
+        accessors: A tuple of the root node and the functions to walk the
+            Huffman Tree returned by _tree_accessors
+
+    Returns:
+        nodes: A list of the nodes of the tree that are not leaves, in the
+            same order for trees of the same shape
+    """
+    root, get_child, get_char = accessors
+    nodes = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if get_char(node) is not None:
+            continue
+
+        nodes.append(node)
+        for bit in (1, 0):
+            child = get_child(node, bit)
+            if child is not None:
+                stack.append(child)
+
+    return nodes
+
+
+def _tree_accessors(root):
+    """Creates functions to walk either kind of Huffman Tree.
+
+    Args:
+        root: A HuffmanNode object representing the root node of a Huffman Tree
+            or a HuffmanTree object
+
+    Returns:
+        root: The root HuffmanNode object or the int id of the root node
+        get_child: A function taking a node and a bit and returning the left
+            child for 0 and the right child for 1, or None if it is missing
+        get_char: A function taking a node and returning its char, or None if
+            it is not a leaf
+    """
+    if not isinstance(root, HuffmanTree):
+
+        def get_child(node, bit):
+            return node.right if bit else node.left
+
+        def get_char(node):
+            return node.char
+
+        return root, get_child, get_char
+
+    tree = root
+    branches = (tree.left, tree.right)
+
+    def get_child(node_id, bit):
+        child_id = branches[bit][node_id]
+        return None if child_id < 0 else child_id
+
+    def get_char(node_id):
+        char_id = tree.char_ids[node_id]
+        return None if char_id < 0 else tree.chars[char_id]
+
+    return tree.root, get_child, get_char
+
+
+def benchmark_decoding(data, repeat=5, table_bits=None):
+    """Times the decoders against the original tree walking decoder.
+
+    The original decoder walked a str of "0" and "1" characters one at a time
+    and concatenated each decoded char onto a str.
+
+    Args:
+        data: A str to encode and then decode with each decoder
+        repeat: An int representing the number of times to time each decoder
+        table_bits: An int representing the number of bits to index the
+            decoding table by, or None for the default
+
+    Returns:
+        timings: A dict of the best time in seconds taken by each decoder,
+            where the table decoder is timed both with a prebuilt table and
+            including building the table
+    """
+    packed_data, root = huffman_encoding_packed(data)
+    encoded_data = str(packed_data)
+    table = build_decoding_table(root, table_bits)
+
+    def concat_decoding():
+        decoded_data = ""
+        node = root
+        for bit in encoded_data:
+            if bit == "0":
+                node = node.left
+            else:
+                node = node.right
+
+            if node.char is not None:
+                decoded_data += node.char
+                node = root
+
+        return decoded_data
+
+    decoders = {
+        "concat": concat_decoding,
+        "tree": lambda: huffman_decoding(encoded_data, root),
+        "table": lambda: huffman_table_decoding(packed_data, root, table),
+        "table_with_build": lambda: huffman_table_decoding(packed_data, root),
+    }
+
+    timings = {}
+    for name, decoder in decoders.items():
+        assert decoder() == data
+        timings[name] = min(timeit.repeat(decoder, number=1, repeat=repeat))
+
+    return timings
+
+
+def benchmark_encoding(data, repeat=5):
+    """Times the encoders against concatenating a str one code at a time.
+
+    Args:
+        data: A str to encode with each encoder
+        repeat: An int representing the number of times to time each encoder
+
+    Returns:
+        timings: A dict of the best time in seconds taken by each encoder,
+            each including building the Huffman Tree
+    """
+
+    def concat_encoding():
+        root = build_huffman_tree(data)
+        huffman_codes = get_huffman_codes(root, {})
+        encoded_data = ""
+        for char in data:
+            encoded_data += huffman_codes[char]
+
+        return encoded_data, root
+
+    encoders = {
+        "concat": concat_encoding,
+        "str": lambda: huffman_encoding(data),
+        "packed": lambda: huffman_encoding_packed(data),
+    }
+
+    timings = {}
+    for name, encoder in encoders.items():
+        timings[name] = min(timeit.repeat(encoder, number=1, repeat=repeat))
+
+    return timings
+
+
+def benchmark_tree_build(data, repeat=5):
+    """Times the phases of building a Huffman Tree.
+
+    Args:
+        data: A bytes-like object to build the Huffman Tree from
+        repeat: An int representing the number of times to time each phase
+
+    Returns:
+        timings: A dict of the best time in seconds taken to count the bytes
+            with a Python loop, to count them with count_frequencies, to build
+            the tree from the counted frequencies and to do both at once
+    """
+
+    def loop_count():
+        frequencies = {}
+        for byte in data:
+            frequencies[byte] = frequencies.get(byte, 0) + 1
+
+        return frequencies
+
+    frequencies = count_frequencies(data)
+    phases = {
+        "loop_count": loop_count,
+        "count": lambda: count_frequencies(data),
+        "build": lambda: build_huffman_tree_linear(
+            None, frequencies=frequencies
+        ),
+        "count_and_build": lambda: build_huffman_tree_linear(data),
+    }
+
+    timings = {}
+    for name, phase in phases.items():
+        timings[name] = min(timeit.repeat(phase, number=1, repeat=repeat))
+
+    return timings
+
+
 if __name__ == "__main__":
     main()
@@ -4,12 +4,61 @@ Usage: lru_cache.py
 
 Classes:
     LruCache()
+    LruCacheNode()
+    ConcurrentLruCache()
+    CompactLruCache()
+    SegmentedLruCache()
+    TwoQueueCache()
+    CountMinSketch()
+    TinyLfuCache()
+    CacheLoader()
+    SharedLruCache()
+
+Functions:
+    memoize()
 """
 
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import heapq
+import inspect
+import mmap
+import os
+import pickle
+import random
+import struct
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_SHARD_COUNT = 16
+DEFAULT_MEMOIZE_CAPACITY = 128
+SWEEP_LIMIT = 4
+SNAPSHOT_MAGIC = b"LRUSNAP2"
+SHARED_MAGIC = b"LRUSHM01"
+SHARED_HEADER = struct.Struct("<8sIIIQ")
+SHARED_SLOT = struct.Struct("<QQII")
+_MISSING = object()
+
 
 class LruCache:
     """Cache object that removes the least recently used when at capacity.
 
+    Entries can optionally be given a weight, in which case the capacity is
+    the max total weight rather than the max number of entries, and a time to
+    live after which they are no longer returned by get. Expired entries are
+    removed when they are retrieved and by sweep_expired, which is called with
+    a small limit on every put.
+
     Attributes:
         cache: A dict representing the cache object holding nodes to a double
             linked list holding LruCacheNode objects
@@ -18,61 +67,187 @@ class LruCache:
             cache and the beginning of a doubly linked list
         tail: A LruCacheNode representing the least recently used object in the
             cache and the beginning of a doubly linked list
+        size: An int representing the total weight of the entries in the cache
+        weigher: A function taking a key and value and returning the int
+            weight of the entry, or None to give every entry a weight of 1
+        ttl: A number representing the default seconds an entry lives for, or
+            None for entries to never expire
+        clock: A function returning the current time in seconds
+        expiry_heap: A list used as a heap of tuples of the time an entry
+            expires, a tie-breaker and the LruCacheNode of the entry
+        expiry_id: An int used as the tie-breaker for the next expiry heap
+            entry
+        evictions: An int representing the number of entries removed to make
+            room for new entries
+        hits: An int representing the number of lookups found in the cache
+        misses: An int representing the number of lookups not in the cache
     """
 
-    def __init__(self, capacity):
+    def __init__(self, capacity, weigher=None, ttl=None, clock=time.monotonic):
         """Set-up for a least recently used cache."""
         self.cache = {}
         self.capacity = capacity
         self.head = None
         self.tail = None
+        self.size = 0
+        self.weigher = weigher
+        self.ttl = ttl
+        self.clock = clock
+        self.expiry_heap = []
+        self.expiry_id = 0
+        self.evictions = 0
+        self.hits = 0
+        self.misses = 0
 
-    def get(self, key):
+    def get(self, key, default=-1):
         """Retrieve a value from the cache.
 
         Args:
             key: An int representing the key from the cache to retreive
+            default: The value to return if the key is not in the cache
 
         Returns:
             value: An int representing the value retrieved
         """
         if key not in self.cache:
-            return -1
+            self.misses += 1
+            return default
 
         node = self.cache[key]
+        if node.expires_at is not None and node.expires_at <= self.clock():
+            self.delete(key)
+            self.misses += 1
+            return default
+
         self.update_most_recently_used(node)
+        self.hits += 1
 
         return node.value
 
-    def put(self, key, value):
+    def get_many(self, keys):
+        """Retrieve the values of several keys from the cache.
+
+        Keys are marked as used in the order given, as if get had been called
+        for each of them.
+
+        Args:
+            keys: An iterable of keys from the cache to retrieve
+
+        Returns:
+            values: A dict of the keys found in the cache and their values
+        """
+        values = {}
+        cache = self.cache
+        now = self.clock()
+        for key in keys:
+            node = cache.get(key)
+            if node is None:
+                self.misses += 1
+                continue
+
+            if node.expires_at is not None and node.expires_at <= now:
+                self.delete(key)
+                self.misses += 1
+                continue
+
+            self.update_most_recently_used(node)
+            values[key] = node.value
+            self.hits += 1
+
+        return values
+
+    def put_many(self, items, ttl=None):
+        """Place several values into the cache.
+
+        Args:
+            items: A dict or an iterable of tuples of keys and values to place
+                into the cache
+            ttl: A number representing the seconds the entries live for, which
+                defaults to the ttl of the cache
+        """
+        if isinstance(items, dict):
+            items = items.items()
+
+        put = self.put
+        for key, value in items:
+            put(key, value, ttl)
+
+    def delete_many(self, keys):
+        """Remove the resources at several keys from the cache.
+
+        Args:
+            keys: An iterable of keys of the resources to remove
+
+        Returns:
+            deleted: An int representing the number of keys that were in the
+                cache
+        """
+        delete = self.delete
+        deleted = 0
+        for key in keys:
+            deleted += delete(key)
+
+        return deleted
+
+    def stats(self):
+        """Summarize the counters of the cache.
+
+        Returns:
+            A dict of the hits, misses, evictions, the number of entries and
+            the total weight of the entries in the cache
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.cache),
+            "size": self.size,
+        }
+
+    def put(self, key, value, ttl=None):
         """Place a value into the cache at the given key.
 
+        An entry weighing more than the capacity of the cache is not stored.
+
         Args:
             key: An int representing the key at which to place the value in the
                 cache
             value: An int representing the value to place into the cache
+            ttl: A number representing the seconds the entry lives for, which
+                defaults to the ttl of the cache
         """
+        weight = 1 if self.weigher is None else self.weigher(key, value)
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else self.clock() + ttl
+        self.sweep_expired(SWEEP_LIMIT)
+
         if key in self.cache:
-            node = self.cache[key]
-            node.value = value
-            self.update_most_recently_used(node)
+            self.delete(key)
+
+        if weight > self.capacity:
             return
 
-        if len(self.cache) == self.capacity:
+        while self.size + weight > self.capacity:
             self.remove()
 
-        node = LruCacheNode(key, value, self.head)
+        node = LruCacheNode(key, value, self.head, weight, expires_at)
         self.cache[key] = node
         self.head = node
+        self.size += weight
 
         if node.next is None:
             self.tail = node
         else:
             node.next.prev = node
 
+        if expires_at is not None:
+            self.push_expiry(node)
+
     def remove(self):
         """Remove the least recently used resource from the cache."""
         del self.cache[self.tail.key]
+        self.size -= self.tail.weight
+        self.evictions += 1
         self.tail = self.tail.prev
 
         if self.tail is None:
@@ -82,6 +257,36 @@ class LruCache:
         self.tail.next.prev = None
         self.tail.next = None
 
+    def delete(self, key):
+        """Remove the resource at the given key from the cache.
+
+        Args:
+            key: An int representing the key of the resource to remove
+
+        Returns:
+            A boolean representing if the key was in the cache
+        """
+        node = self.cache.pop(key, None)
+        if node is None:
+            return False
+
+        self.size -= node.weight
+
+        if node.prev is None:
+            self.head = node.next
+        else:
+            node.prev.next = node.next
+
+        if node.next is None:
+            self.tail = node.prev
+        else:
+            node.next.prev = node.prev
+
+        node.prev = None
+        node.next = None
+
+        return True
+
     def update_most_recently_used(self, node):
         """Move a node to the head of the doubly linked list.
 
@@ -102,6 +307,119 @@ class LruCache:
         self.head.prev = node
         self.head = node
 
+    def push_expiry(self, node):
+        """Add a node to the expiry heap.
+
+        The heap is rebuilt from the nodes still in the cache whenever it holds
+        more than twice as many entries as the cache, so that entries for nodes
+        that were replaced or evicted do not build up.
+
+        Args:
+            node: A LruCacheNode with an expiry time
+        """
+        if len(self.expiry_heap) > 2 * len(self.cache) + SWEEP_LIMIT:
+            self.expiry_heap = [
+                entry for entry in self.expiry_heap if self.is_live(entry)
+            ]
+            heapq.heapify(self.expiry_heap)
+
+        heapq.heappush(
+            self.expiry_heap, (node.expires_at, self.expiry_id, node)
+        )
+        self.expiry_id += 1
+
+    def sweep_expired(self, limit=None):
+        """Remove expired resources from the cache.
+
+        Args:
+            limit: An int representing the max number of expired entries to
+                look at, or None to remove every expired entry
+        """
+        now = self.clock()
+        swept = 0
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            if limit is not None and swept == limit:
+                return
+
+            entry = heapq.heappop(self.expiry_heap)
+            if self.is_live(entry):
+                self.delete(entry[2].key)
+
+            swept += 1
+
+    def is_live(self, entry):
+        """Determines if an expiry heap entry belongs to a node in the cache.
+
+        Args:
+            entry: A tuple from the expiry heap
+
+        Returns:
+            A boolean representing if the entry's node is still in the cache
+        """
+        expires_at, _, node = entry
+
+        return (
+            self.cache.get(node.key) is node and node.expires_at == expires_at
+        )
+
+    def snapshot(self, path):
+        """Save the entries in the cache to a file.
+
+        Entries are written from most to least recently used as a count, the
+        wall clock time of the snapshot and then a pickled key, value and
+        remaining seconds to live for each. The file is written to a temporary
+        path first and then moved into place so a crash cannot leave a partial
+        snapshot behind.
+
+        Args:
+            path: A str representing the path of the file to save to
+        """
+        now = self.clock()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as snapshot_file:
+            snapshot_file.write(SNAPSHOT_MAGIC)
+            snapshot_file.write(
+                struct.pack("<Qd", len(self.cache), time.time())
+            )
+            pickler = pickle.Pickler(snapshot_file, pickle.HIGHEST_PROTOCOL)
+            node = self.head
+            while node is not None:
+                ttl = None
+                if node.expires_at is not None:
+                    ttl = node.expires_at - now
+
+                pickler.dump((node.key, node.value, ttl))
+                node = node.next
+
+        os.replace(tmp_path, path)
+
+    def restore(self, path):
+        """Place the entries saved by snapshot into the cache.
+
+        Entries are put from least to most recently used so that the cache
+        ends up in the same order it was saved in. The wall clock time since
+        the snapshot, such as time the process was down, is taken off the
+        remaining time to live of each entry, and entries that have expired
+        since the snapshot are skipped.
+
+        Args:
+            path: A str representing the path of the file to restore from
+        """
+        with open(path, "rb") as snapshot_file:
+            if snapshot_file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a LruCache snapshot")
+
+            count, saved_at = struct.unpack("<Qd", snapshot_file.read(16))
+            unpickler = pickle.Unpickler(snapshot_file)
+            entries = [unpickler.load() for _ in range(count)]
+
+        elapsed = max(time.time() - saved_at, 0)
+        for key, value, ttl in reversed(entries):
+            if ttl is None:
+                self.put(key, value)
+            elif ttl > elapsed:
+                self.put(key, value, ttl - elapsed)
+
 
 class LruCacheNode:
     """Creates a Node object for a Least Recently Used Cache.
@@ -113,43 +431,1438 @@ class LruCacheNode:
             linked list
         next: A LruCache Node object representing the next node in a doubly
             linked list
+        weight: An int representing the weight of the entry
+        expires_at: A number representing the time the entry expires, or None
+            if it never expires
     """
 
-    def __init__(self, key, value, head):
+    __slots__ = ("key", "value", "prev", "next", "weight", "expires_at")
+
+    def __init__(self, key, value, head, weight=1, expires_at=None):
         """Set-up for a least recently used cache node."""
         self.key = key
         self.value = value
         self.prev = None
         self.next = head
+        self.weight = weight
+        self.expires_at = expires_at
 
 
-def main():
-    """Main function call to test the functionality of the LruCache."""
-    our_cache = LruCache(5)
-    our_cache.put(1, 1)
-    our_cache.put(2, 2)
-    our_cache.put(3, 3)
-    our_cache.put(4, 4)
-    assert our_cache.get(1) == 1
-    assert our_cache.get(2) == 2
-    assert our_cache.get(9) == -1
-    our_cache.put(5, 5)
-    our_cache.put(6, 6)
-    assert our_cache.get(3) == -1
+class ConcurrentLruCache:
+    """Thread-safe cache split into independently locked LruCache shards.
 
-    our_cache = LruCache(3)
-    our_cache.put(1, 1)
-    our_cache.put(2, 2)
-    our_cache.put(3, 3)
-    our_cache.put(4, 4)
-    assert our_cache.get(4) == 4
-    assert our_cache.get(1) == -1
-    our_cache.put(2, 4)
-    assert our_cache.get(2) == 4
-    our_cache.put(5, 5)
-    assert our_cache.get(3) == -1
+    Each key is assigned to a shard by its hash, so threads working on keys in
+    different shards do not wait on each other. Each shard evicts its own least
+    recently used entry, so eviction order is only least recently used within
+    a shard.
 
-    print("All test cases passed!")
+    Attributes:
+        shards: A list of LruCache objects each holding part of the cache
+        locks: A list of Lock objects guarding the shard at the same index
+        capacity: An int representing the capacity of the cache
+    """
+
+    def __init__(self, capacity, shard_count=DEFAULT_SHARD_COUNT):
+        """Set-up for a concurrent least recently used cache."""
+        shard_count = max(min(shard_count, capacity), 1)
+        shard_capacity, remainder = divmod(capacity, shard_count)
+        self.shards = [
+            LruCache(shard_capacity + (idx < remainder))
+            for idx in range(shard_count)
+        ]
+        self.locks = [threading.Lock() for _ in range(shard_count)]
+        self.capacity = capacity
+
+    def get(self, key):
+        """Retrieve a value from the cache.
+
+        Args:
+            key: An int representing the key from the cache to retreive
+
+        Returns:
+            value: An int representing the value retrieved
+        """
+        idx = hash(key) % len(self.shards)
+        with self.locks[idx]:
+            return self.shards[idx].get(key)
+
+    def put(self, key, value):
+        """Place a value into the cache at the given key.
+
+        Args:
+            key: An int representing the key at which to place the value in the
+                cache
+            value: An int representing the value to place into the cache
+        """
+        idx = hash(key) % len(self.shards)
+        with self.locks[idx]:
+            self.shards[idx].put(key, value)
+
+
+class CompactLruCache:
+    """Least recently used cache stored in parallel arrays instead of nodes.
+
+    Each entry occupies a slot, an int index into parallel lists of keys and
+    values and arrays of previous and next slots, which form the doubly linked
+    list. Slots freed by remove are kept in a free list to be reused.
+
+    Attributes:
+        cache: A dict of keys and the slot holding their entry
+        capacity: An int representing the capacity of the cache
+        keys: A list of the key held in each slot
+        values: A list of the value held in each slot
+        prev: An array of ints representing the previous slot of each slot in
+            the linked list, or -1 for the head
+        next: An array of ints representing the next slot of each slot in the
+            linked list, or -1 for the tail
+        head: An int representing the slot of the most recently used entry
+        tail: An int representing the slot of the least recently used entry
+        free: A list of ints representing slots that are not in use
+    """
+
+    def __init__(self, capacity):
+        """Set-up for a compact least recently used cache."""
+        self.cache = {}
+        self.capacity = capacity
+        self.keys = []
+        self.values = []
+        self.prev = array("i")
+        self.next = array("i")
+        self.head = -1
+        self.tail = -1
+        self.free = []
+
+    def get(self, key):
+        """Retrieve a value from the cache.
+
+        Args:
+            key: An int representing the key from the cache to retreive
+
+        Returns:
+            value: An int representing the value retrieved
+        """
+        slot = self.cache.get(key, -1)
+        if slot == -1:
+            return -1
+
+        self.update_most_recently_used(slot)
+
+        return self.values[slot]
+
+    def put(self, key, value):
+        """Place a value into the cache at the given key.
+
+        Args:
+            key: An int representing the key at which to place the value in the
+                cache
+            value: An int representing the value to place into the cache
+        """
+        slot = self.cache.get(key, -1)
+        if slot != -1:
+            self.values[slot] = value
+            self.update_most_recently_used(slot)
+            return
+
+        if len(self.cache) == self.capacity:
+            self.remove()
+
+        if self.free:
+            slot = self.free.pop()
+            self.keys[slot] = key
+            self.values[slot] = value
+        else:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.values.append(value)
+            self.prev.append(-1)
+            self.next.append(-1)
+
+        self.cache[key] = slot
+        self.link_head(slot)
+
+    def remove(self):
+        """Remove the least recently used resource from the cache."""
+        slot = self.tail
+        del self.cache[self.keys[slot]]
+        self.unlink(slot)
+        self.keys[slot] = None
+        self.values[slot] = None
+        self.free.append(slot)
+
+    def update_most_recently_used(self, slot):
+        """Move a slot to the head of the doubly linked list.
+
+        Args:
+            slot: An int representing the slot of the most recently used entry
+        """
+        if slot == self.head:
+            return
+
+        self.unlink(slot)
+        self.link_head(slot)
+
+    def link_head(self, slot):
+        """Insert an unlinked slot at the head of the doubly linked list.
+
+        Args:
+            slot: An int representing the slot to insert
+        """
+        self.prev[slot] = -1
+        self.next[slot] = self.head
+        if self.head == -1:
+            self.tail = slot
+        else:
+            self.prev[self.head] = slot
+
+        self.head = slot
+
+    def unlink(self, slot):
+        """Remove a slot from the doubly linked list.
+
+        Args:
+            slot: An int representing the slot to remove
+        """
+        prev_slot = self.prev[slot]
+        next_slot = self.next[slot]
+        if prev_slot == -1:
+            self.head = next_slot
+        else:
+            self.next[prev_slot] = next_slot
+
+        if next_slot == -1:
+            self.tail = prev_slot
+        else:
+            self.prev[next_slot] = prev_slot
+
+
+class SegmentedLruCache:
+    """Cache split into probationary and protected least recently used lists.
+
+    New entries go into the probationary segment and are only promoted to the
+    protected segment when they are retrieved again, so a scan of keys that
+    are each used once can only flush the probationary segment. Entries evicted
+    from the protected segment are moved back to the probationary segment. The
+    probationary segment may use any space the protected segment is not using.
+
+    Attributes:
+        probation: A LruCache holding entries that have been used once
+        protected: A LruCache holding entries that have been used again
+        capacity: An int representing the capacity of the cache
+    """
+
+    def __init__(self, capacity, protected_ratio=0.8):
+        """Set-up for a segmented least recently used cache."""
+        self.probation = LruCache(capacity)
+        self.protected = LruCache(int(capacity * protected_ratio))
+        self.capacity = capacity
+
+    def __len__(self):
+        """The number of entries in the cache."""
+        return len(self.probation.cache) + len(self.protected.cache)
+
+    def __contains__(self, key):
+        """Determines if a key is in the cache."""
+        return key in self.protected.cache or key in self.probation.cache
+
+    def get(self, key):
+        """Retrieve a value from the cache.
+
+        Args:
+            key: An int representing the key from the cache to retreive
+
+        Returns:
+            value: An int representing the value retrieved
+        """
+        if key in self.protected.cache:
+            return self.protected.get(key)
+
+        value = self.probation.get(key)
+        if value == -1 or self.protected.capacity == 0:
+            return value
+
+        self.probation.delete(key)
+        if len(self.protected.cache) == self.protected.capacity:
+            demoted = self.protected.tail
+            self.protected.remove()
+            self.probation.put(demoted.key, demoted.value)
+
+        self.protected.put(key, value)
+
+        return value
+
+    def put(self, key, value):
+        """Place a value into the cache at the given key.
+
+        Args:
+            key: An int representing the key at which to place the value in the
+                cache
+            value: An int representing the value to place into the cache
+        """
+        if key in self.protected.cache:
+            self.protected.put(key, value)
+            return
+
+        if key not in self.probation.cache and len(self) == self.capacity:
+            self.remove()
+
+        self.probation.put(key, value)
+
+    def remove(self):
+        """Remove the least recently used probationary resource, if any."""
+        if self.probation.cache:
+            self.probation.remove()
+        elif self.protected.cache:
+            self.protected.remove()
+
+    def victim(self):
+        """The key that the next new entry would cause to be evicted.
+
+        Returns:
+            The least recently used probationary key, if any, or else the least
+            recently used protected key
+        """
+        if self.probation.cache:
+            return self.probation.tail.key
+
+        return self.protected.tail.key
+
+
+class TwoQueueCache:
+    """Cache that keeps entries used once in a queue apart from the main cache.
+
+    New entries are added to a first-in first-out queue. Entries pushed out
+    of that queue leave their key behind in a ghost list, and an entry that
+    is put again while its key is in the ghost list goes into the main least
+    recently used list instead, so keys that are used only once never push
+    entries out of the main list.
+
+    Attributes:
+        recent: A LruCache used as a first-in first-out queue of new entries
+        ghosts: A LruCache holding the keys recently pushed out of recent
+        frequent: A LruCache holding entries that have been used again
+        capacity: An int representing the capacity of the cache
+    """
+
+    def __init__(self, capacity, recent_ratio=0.25, ghost_ratio=0.5):
+        """Set-up for a 2Q cache."""
+        recent_capacity = min(max(int(capacity * recent_ratio), 1), capacity)
+        self.recent = LruCache(recent_capacity)
+        self.ghosts = LruCache(max(int(capacity * ghost_ratio), 1))
+        self.frequent = LruCache(capacity - recent_capacity)
+        self.capacity = capacity
+
+    def get(self, key):
+        """Retrieve a value from the cache.
+
+        Args:
+            key: An int representing the key from the cache to retreive
+
+        Returns:
+            value: An int representing the value retrieved
+        """
+        if key in self.recent.cache:
+            return self.recent.cache[key].value
+
+        return self.frequent.get(key)
+
+    def put(self, key, value):
+        """Place a value into the cache at the given key.
+
+        Args:
+            key: An int representing the key at which to place the value in the
+                cache
+            value: An int representing the value to place into the cache
+        """
+        if key in self.recent.cache:
+            self.recent.cache[key].value = value
+        elif key in self.frequent.cache or key in self.ghosts.cache:
+            self.ghosts.delete(key)
+            self.frequent.put(key, value)
+        else:
+            if self.recent.cache and (
+                len(self.recent.cache) == self.recent.capacity
+            ):
+                self.ghosts.put(self.recent.tail.key, None)
+
+            self.recent.put(key, value)
+
+
+class CountMinSketch:
+    """Approximately counts how often keys are seen in a fixed amount of space.
+
+    Each key is counted in one counter of each row, chosen by hashing the key
+    with the row number, and its count is estimated as the smallest of those
+    counters. Once sample_size keys have been counted every counter is halved
+    so that older counts fade away.
+
+    Attributes:
+        width: An int representing the number of counters in each row
+        depth: An int representing the number of rows
+        counters: An array of ints holding every row of counters
+        sample_size: An int representing the number of keys to count before
+            the counters are halved
+        additions: An int representing the number of keys counted since the
+            counters were last halved
+    """
+
+    def __init__(self, width, depth=4, sample_size=None):
+        """Set-up for the count-min sketch."""
+        self.width = max(width, 1)
+        self.depth = depth
+        self.counters = array("l", bytes(8 * self.width * depth))
+        self.sample_size = sample_size or 10 * self.width
+        self.additions = 0
+
+    def add(self, key):
+        """Count a key.
+
+        Args:
+            key: A hashable key to count
+        """
+        for row in range(self.depth):
+            self.counters[self.index(key, row)] += 1
+
+        self.additions += 1
+        if self.additions == self.sample_size:
+            for idx, count in enumerate(self.counters):
+                self.counters[idx] = count >> 1
+
+            self.additions = 0
+
+    def estimate(self, key):
+        """Estimate how often a key has been counted.
+
+        Args:
+            key: A hashable key to estimate the count of
+
+        Returns:
+            An int representing the estimated count, which is never less than
+            the true count since the counters were last halved
+        """
+        return min(
+            self.counters[self.index(key, row)] for row in range(self.depth)
+        )
+
+    def index(self, key, row):
+        """Find the index of the counter for a key in a row.
+
+        Args:
+            key: A hashable key
+            row: An int representing the row of counters
+
+        Returns:
+            An int index into counters
+        """
+        return row * self.width + hash((row, key)) % self.width
+
+
+class TinyLfuCache:
+    """Cache that only admits entries used more often than the ones evicted.
+
+    New entries go into a small least recently used window. An entry pushed out
+    of the window is only admitted into the main segmented cache, if it is
+    full, when a count-min sketch of recent accesses estimates it has been used
+    more often than the entry the main cache would evict to make room for it.
+
+    Attributes:
+        window: A LruCache holding the most recently added entries
+        main: A SegmentedLruCache holding the admitted entries
+        sketch: A CountMinSketch counting accesses to every key
+        capacity: An int representing the capacity of the cache
+    """
+
+    def __init__(self, capacity, window_ratio=0.01):
+        """Set-up for a W-TinyLFU cache."""
+        window_capacity = min(max(int(capacity * window_ratio), 1), capacity)
+        self.window = LruCache(window_capacity)
+        self.main = SegmentedLruCache(capacity - window_capacity)
+        self.sketch = CountMinSketch(capacity)
+        self.capacity = capacity
+
+    def get(self, key):
+        """Retrieve a value from the cache.
+
+        Args:
+            key: An int representing the key from the cache to retreive
+
+        Returns:
+            value: An int representing the value retrieved
+        """
+        self.sketch.add(key)
+        if key in self.window.cache:
+            return self.window.get(key)
+
+        return self.main.get(key)
+
+    def put(self, key, value):
+        """Place a value into the cache at the given key.
+
+        Args:
+            key: An int representing the key at which to place the value in the
+                cache
+            value: An int representing the value to place into the cache
+        """
+        self.sketch.add(key)
+        if key in self.window.cache:
+            self.window.put(key, value)
+            return
+
+        if key in self.main:
+            self.main.put(key, value)
+            return
+
+        if self.window.cache and (
+            len(self.window.cache) == self.window.capacity
+        ):
+            self.admit(self.window.tail.key, self.window.tail.value)
+            self.window.remove()
+
+        self.window.put(key, value)
+
+    def admit(self, key, value):
+        """Decide whether an entry leaving the window enters the main cache.
+
+        Args:
+            key: An int representing the key of the entry leaving the window
+            value: An int representing the value of the entry
+        """
+        if len(self.main) < self.main.capacity:
+            self.main.put(key, value)
+            return
+
+        if not self.main.capacity:
+            return
+
+        victim = self.main.victim()
+        if self.sketch.estimate(key) > self.sketch.estimate(victim):
+            self.main.put(key, value)
+
+
+class CacheLoader:
+    """Loads values into a LruCache when they are missing from it.
+
+    Concurrent misses on the same key share a single call to the loader
+    rather than each calling it, both for coroutines awaiting get_or_load and
+    for threads calling get_or_call.
+
+    Attributes:
+        cache: A LruCache holding the loaded values
+        lock: A Lock object guarding the cache and the loads in flight
+        pending: A dict of keys and the asyncio Task of the coroutine
+            loading them, which every caller waiting on the key awaits
+        calls: A dict of keys and the Future of the thread loading them
+        hits: An int representing the number of lookups found in the cache
+        misses: An int representing the number of lookups not in the cache
+        loads: An int representing the number of calls made to a loader
+        load_time: A float representing the total seconds spent in loaders
+        max_load_time: A float representing the longest seconds spent in a
+            single call to a loader
+    """
+
+    def __init__(self, cache):
+        """Set-up for the cache loader."""
+        self.cache = cache
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.calls = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_time = 0.0
+        self.max_load_time = 0.0
+
+    async def get_or_load(self, key, coro_fn):
+        """Retrieve a value from the cache, awaiting coro_fn if it is missing.
+
+        Args:
+            key: A hashable key from the cache to retrieve
+            coro_fn: A coroutine function taking the key and returning the
+                value to cache
+
+        Returns:
+            value: The cached or loaded value
+        """
+        with self.lock:
+            value = self.lookup(key)
+
+        if value is not _MISSING:
+            return value
+
+        task = self.pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, coro_fn))
+            task.add_done_callback(_retrieve_exception)
+            self.pending[key] = task
+
+        return await asyncio.shield(task)
+
+    async def _load(self, key, coro_fn):
+        """Await coro_fn and cache its value in a task of its own.
+
+        Args:
+            key: A hashable key to load into the cache
+            coro_fn: A coroutine function taking the key and returning the
+                value to cache
+
+        Returns:
+            value: The loaded value
+        """
+        start = time.perf_counter()
+        try:
+            value = await coro_fn(key)
+            self.store(key, value)
+            return value
+        finally:
+            self.record_load(time.perf_counter() - start)
+            del self.pending[key]
+
+    def get_or_call(self, key, fn):
+        """Retrieve a value from the cache, calling fn if it is missing.
+
+        Args:
+            key: A hashable key from the cache to retrieve
+            fn: A function taking the key and returning the value to cache
+
+        Returns:
+            value: The cached or loaded value
+        """
+        with self.lock:
+            value = self.lookup(key)
+            if value is not _MISSING:
+                return value
+
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = concurrent.futures.Future()
+
+        if not leader:
+            return future.result()
+
+        start = time.perf_counter()
+        try:
+            value = fn(key)
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            self.store(key, value)
+            future.set_result(value)
+        finally:
+            self.record_load(time.perf_counter() - start)
+            with self.lock:
+                del self.calls[key]
+
+        return value
+
+    def lookup(self, key):
+        """Retrieve a value from the cache and count the hit or miss.
+
+        Args:
+            key: A hashable key from the cache to retrieve
+
+        Returns:
+            The cached value or _MISSING if the key is not in the cache
+        """
+        value = self.cache.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return value
+
+    def store(self, key, value):
+        """Place a loaded value into the cache.
+
+        Args:
+            key: A hashable key at which to place the value in the cache
+            value: The loaded value to place into the cache
+        """
+        with self.lock:
+            self.cache.put(key, value)
+
+    def record_load(self, elapsed):
+        """Count a call to a loader.
+
+        Args:
+            elapsed: A float representing the seconds the call took
+        """
+        self.loads += 1
+        self.load_time += elapsed
+        self.max_load_time = max(self.max_load_time, elapsed)
+
+    def stats(self):
+        """Summarize the counters of the loader.
+
+        Returns:
+            A dict of the hits, misses, evictions from the cache, loads and
+            the mean and max seconds taken by a load
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.cache.evictions,
+            "loads": self.loads,
+            "mean_load_time": self.load_time / self.loads if self.loads else 0,
+            "max_load_time": self.max_load_time,
+        }
+
+
+class SharedLruCache:
+    """Cache stored in a memory-mapped file that can be shared by processes.
+
+    The file is split into sets of a fixed number of fixed size slots, and
+    each key is stored in the set chosen by a hash of the key. When a set is
+    full the least recently used slot in that set is replaced, so entries are
+    only evicted in least recently used order within a set. Every call takes
+    an exclusive lock on the file, where supported, so processes on the same
+    host can use the same file at once, along with a thread lock, since file
+    locks do not keep apart threads sharing one open file. Keys and values
+    are pickled and must fit in a slot.
+
+    Attributes:
+        path: A str representing the path of the file backing the cache
+        set_count: An int representing the number of sets in the file
+        ways: An int representing the number of slots in each set
+        slot_size: An int representing the number of bytes in each slot
+        file: The open file backing the cache
+        map: A mmap object of the file
+        thread_lock: A Lock object guarding the file between threads
+    """
+
+    def __init__(self, path, capacity=1024, slot_size=256, ways=8):
+        """Set-up for the shared cache, creating the file if it is empty."""
+        self.path = path
+        self.thread_lock = threading.Lock()
+        self.file = open(path, "a+b")
+        with self.lock():
+            self.file.seek(0, os.SEEK_END)
+            if self.file.tell() == 0:
+                set_count = max(-(-capacity // ways), 1)
+                header = SHARED_HEADER.pack(
+                    SHARED_MAGIC, set_count, ways, slot_size, 0
+                )
+                self.file.write(header)
+                self.file.truncate(
+                    SHARED_HEADER.size + set_count * ways * slot_size
+                )
+                self.file.flush()
+
+            self.file.seek(0)
+            header = SHARED_HEADER.unpack(self.file.read(SHARED_HEADER.size))
+
+        magic, self.set_count, self.ways, self.slot_size, _ = header
+        if magic != SHARED_MAGIC:
+            raise ValueError(f"{path} is not a SharedLruCache file")
+
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def __enter__(self):
+        """Use the cache as a context manager."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the cache when leaving the context."""
+        self.close()
+
+    def close(self):
+        """Close the mapping and the file backing the cache."""
+        self.map.close()
+        self.file.close()
+
+    def get(self, key, default=-1):
+        """Retrieve a value from the cache.
+
+        Args:
+            key: A picklable key from the cache to retreive
+            default: The value to return if the key is not in the cache
+
+        Returns:
+            value: The value retrieved
+        """
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        with self.lock():
+            offset, found = self.find_slot(key_bytes)
+            if not found:
+                return default
+
+            self.touch(offset)
+            _, _, key_length, value_length = SHARED_SLOT.unpack_from(
+                self.map, offset
+            )
+            start = offset + SHARED_SLOT.size + key_length
+
+            return pickle.loads(self.map[start : start + value_length])
+
+    def put(self, key, value):
+        """Place a value into the cache at the given key.
+
+        Args:
+            key: A picklable key at which to place the value in the cache
+            value: A picklable value to place into the cache
+        """
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        value_bytes = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if SHARED_SLOT.size + len(key_bytes) + len(value_bytes) > (
+            self.slot_size
+        ):
+            raise ValueError("Key and value do not fit in a slot")
+
+        with self.lock():
+            offset, _ = self.find_slot(key_bytes)
+            SHARED_SLOT.pack_into(
+                self.map,
+                offset,
+                _hash_key(key_bytes),
+                0,
+                len(key_bytes),
+                len(value_bytes),
+            )
+            start = offset + SHARED_SLOT.size
+            self.map[start : start + len(key_bytes)] = key_bytes
+            start += len(key_bytes)
+            self.map[start : start + len(value_bytes)] = value_bytes
+            self.touch(offset)
+
+    def delete(self, key):
+        """Remove the resource at the given key from the cache.
+
+        Args:
+            key: A picklable key of the resource to remove
+
+        Returns:
+            A boolean representing if the key was in the cache
+        """
+        key_bytes = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+        with self.lock():
+            offset, found = self.find_slot(key_bytes)
+            if found:
+                SHARED_SLOT.pack_into(self.map, offset, 0, 0, 0, 0)
+
+        return found
+
+    def find_slot(self, key_bytes):
+        """Find the slot holding a key or the slot to place it in.
+
+        Args:
+            key_bytes: A bytes object of the pickled key
+
+        Returns:
+            offset: An int representing the position in the file of the slot
+                holding the key, or else of an empty slot in the key's set, or
+                else of the least recently used slot in the key's set
+            found: A boolean representing if the slot holds the key
+        """
+        key_hash = _hash_key(key_bytes)
+        set_offset = (
+            SHARED_HEADER.size
+            + (key_hash % self.set_count) * self.ways * self.slot_size
+        )
+        victim = None
+        victim_used = None
+        for way in range(self.ways):
+            offset = set_offset + way * self.slot_size
+            slot_hash, last_used, key_length, _ = SHARED_SLOT.unpack_from(
+                self.map, offset
+            )
+            start = offset + SHARED_SLOT.size
+            if (
+                last_used
+                and slot_hash == key_hash
+                and self.map[start : start + key_length] == key_bytes
+            ):
+                return offset, True
+
+            if victim_used is None or last_used < victim_used:
+                victim = offset
+                victim_used = last_used
+
+        return victim, False
+
+    def touch(self, offset):
+        """Mark a slot as the most recently used.
+
+        Args:
+            offset: An int representing the position in the file of the slot
+        """
+        clock_offset = SHARED_HEADER.size - 8
+        (clock,) = struct.unpack_from("<Q", self.map, clock_offset)
+        struct.pack_into("<Q", self.map, clock_offset, clock + 1)
+        struct.pack_into("<Q", self.map, offset + 8, clock + 1)
+
+    def lock(self):
+        """Creates a context manager holding an exclusive lock on the file.
+
+        Returns:
+            A context manager that locks the file on entry and unlocks it on
+            exit, which only locks out other threads where file locks are not
+            supported
+        """
+        return _FileLock(self.file, self.thread_lock)
+
+
+class _FileLock:
+    """Context manager holding an exclusive lock on a file.
+
+    flock locks belong to the open file, so threads sharing the file would all
+    hold the lock at once; a thread lock is taken first to keep them apart.
+    """
+
+    def __init__(self, file, thread_lock):
+        """Set-up for the file lock."""
+        self.file = file
+        self.thread_lock = thread_lock
+
+    def __enter__(self):
+        """Lock the file."""
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                self.thread_lock.release()
+                raise
+
+    def __exit__(self, *exc_info):
+        """Unlock the file."""
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self.thread_lock.release()
+
+
+def _retrieve_exception(task):
+    """Mark the exception of a load as retrieved if every caller was cancelled.
+
+    Args:
+        task: The finished asyncio Task of a load
+    """
+    if not task.cancelled():
+        task.exception()
+
+
+def _hash_key(key_bytes):
+    """Hash a pickled key the same way in every process.
+
+    Args:
+        key_bytes: A bytes object of the pickled key
+
+    Returns:
+        An int hash of the key
+    """
+    return int.from_bytes(
+        hashlib.blake2b(key_bytes, digest_size=8).digest(), "big"
+    )
+
+
+def memoize(capacity=DEFAULT_MEMOIZE_CAPACITY, cache=None):
+    """Creates a decorator caching the results of a function in a LruCache.
+
+    Works on both functions and coroutine functions, and concurrent calls with
+    the same arguments share a single call to the decorated function. The
+    CacheLoader is available as the loader attribute of the decorated
+    function.
+
+    Args:
+        capacity: An int representing the capacity of the LruCache
+        cache: A LruCache to use instead of creating one, which may be shared
+            by several decorated functions since their keys also hold the
+            name of the function
+
+    Returns:
+        decorator: A function that decorates a function with a cache
+    """
+
+    def decorator(fn):
+        loader = CacheLoader(LruCache(capacity) if cache is None else cache)
+        scope = None if cache is None else (fn.__module__, fn.__qualname__)
+
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                return await loader.get_or_load(
+                    _make_key(args, kwargs, scope),
+                    lambda _: fn(*args, **kwargs),
+                )
+
+        else:
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return loader.get_or_call(
+                    _make_key(args, kwargs, scope),
+                    lambda _: fn(*args, **kwargs),
+                )
+
+        wrapper.loader = loader
+
+        return wrapper
+
+    return decorator
+
+
+def _make_key(args, kwargs, scope=None):
+    """Creates a cache key from the arguments of a call.
+
+    Args:
+        args: A tuple of positional arguments
+        kwargs: A dict of keyword arguments
+        scope: A hashable value, such as the name of the called function, to
+            tell apart keys of different functions sharing a cache, or None
+
+    Returns:
+        key: A hashable key for the call
+    """
+    key = args
+    if kwargs:
+        key = args, tuple(sorted(kwargs.items()))
+
+    if scope is not None:
+        key = scope, key
+
+    return key
+
+
+def main():
+    """Main function call to test the functionality of the LruCache."""
+    for cache_class in (LruCache, CompactLruCache):
+        our_cache = cache_class(5)
+        our_cache.put(1, 1)
+        our_cache.put(2, 2)
+        our_cache.put(3, 3)
+        our_cache.put(4, 4)
+        assert our_cache.get(1) == 1
+        assert our_cache.get(2) == 2
+        assert our_cache.get(9) == -1
+        our_cache.put(5, 5)
+        our_cache.put(6, 6)
+        assert our_cache.get(3) == -1
+
+        our_cache = cache_class(3)
+        our_cache.put(1, 1)
+        our_cache.put(2, 2)
+        our_cache.put(3, 3)
+        our_cache.put(4, 4)
+        assert our_cache.get(4) == 4
+        assert our_cache.get(1) == -1
+        our_cache.put(2, 4)
+        assert our_cache.get(2) == 4
+        our_cache.put(5, 5)
+        assert our_cache.get(3) == -1
+
+    our_cache = CompactLruCache(2)
+    our_cache.put(1, 1)
+    our_cache.put(2, 2)
+    our_cache.remove()
+    assert our_cache.free == [0]
+    our_cache.put(3, 3)
+    assert our_cache.free == []
+    assert our_cache.get(1) == -1
+    assert our_cache.get(2) == 2
+    assert our_cache.get(3) == 3
+
+    now = [0]
+    our_cache = LruCache(3, ttl=10, clock=lambda: now[0])
+    our_cache.put(1, 1)
+    our_cache.put(2, 2, ttl=20)
+    our_cache.put(3, 3, ttl=5)
+    now[0] = 5
+    assert our_cache.get(3) == -1
+    assert our_cache.get(1) == 1
+    now[0] = 10
+    our_cache.put(4, 4)
+    assert list(our_cache.cache) == [2, 4]
+    assert our_cache.get(2) == 2
+    now[0] = 20
+    assert our_cache.get(2) == -1
+    assert our_cache.get(4) == -1
+    assert our_cache.size == 0
+
+    our_cache = LruCache(10, weigher=lambda key, value: len(value))
+    our_cache.put(1, "abcd")
+    our_cache.put(2, "efg")
+    our_cache.put(3, "hij")
+    assert our_cache.size == 10
+    assert our_cache.get(1) == "abcd"
+    our_cache.put(4, "kl")
+    assert our_cache.get(2) == -1
+    assert our_cache.size == 9
+    our_cache.put(3, "mnopqrst")
+    assert list(our_cache.cache) == [4, 3]
+    our_cache.put(5, "uvwxyzabcdefg")
+    assert our_cache.get(5) == -1
+    assert our_cache.get(3) == "mnopqrst"
+
+    our_cache = ConcurrentLruCache(64, shard_count=4)
+    threads = [
+        threading.Thread(target=_run_cache_ops, args=(our_cache, 1000, seed))
+        for seed in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert sum(len(shard.cache) for shard in our_cache.shards) == 64
+    our_cache.put(1, 1)
+    assert our_cache.get(1) == 1
+
+    for cache_class in (SegmentedLruCache, TwoQueueCache, TinyLfuCache):
+        our_cache = cache_class(100)
+        replay_trace(our_cache, [*range(50)] * 3 + [*range(1000, 5000)])
+        assert our_cache.get(-1) == -1
+        assert all(our_cache.get(key) == key for key in range(10))
+        _test_small_capacities(cache_class)
+
+    results = benchmark_policies(capacity=100, trace_length=20000)
+    for trace_name, policy_results in results.items():
+        print(f"Hit ratio and ops per second on {trace_name} trace:")
+        for policy, (hit_ratio, ops_per_sec) in policy_results.items():
+            print(f"    {policy}: {hit_ratio:.3f}, {ops_per_sec:.0f}")
+
+    our_cache = LruCache(3)
+    our_cache.put_many({1: -1, 2: 2})
+    our_cache.put_many([(3, 3), (4, 4)])
+    assert our_cache.get_many([1, 2, 3, 4, 2]) == {2: 2, 3: 3, 4: 4}
+    assert list(our_cache.cache) == [2, 3, 4]
+    assert our_cache.head.key == 2
+    our_cache.put(1, -1)
+    assert our_cache.get(1, None) == -1
+    assert our_cache.get(3, None) is None
+    assert our_cache.delete_many([1, 3, 4]) == 2
+    assert our_cache.stats() == {
+        "hits": 5,
+        "misses": 2,
+        "evictions": 2,
+        "entries": 1,
+        "size": 1,
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "cache")
+        our_cache = LruCache(3)
+        our_cache.put_many([(1, "a"), (2, "b"), (3, "c")])
+        our_cache.get(1)
+        our_cache.snapshot(path)
+        restored_cache = LruCache(3)
+        restored_cache.restore(path)
+        assert list(restored_cache.cache) == [2, 3, 1]
+        assert restored_cache.get(2) == "b"
+
+        our_cache.put(4, "d", ttl=10)
+        our_cache.put(5, "e", ttl=60)
+        our_cache.snapshot(path)
+        with open(path, "r+b") as snapshot_file:
+            snapshot_file.seek(len(SNAPSHOT_MAGIC))
+            count, saved_at = struct.unpack("<Qd", snapshot_file.read(16))
+            snapshot_file.seek(len(SNAPSHOT_MAGIC))
+            snapshot_file.write(struct.pack("<Qd", count, saved_at - 30))
+
+        restored_cache = LruCache(3)
+        restored_cache.restore(path)
+        assert list(restored_cache.cache) == [1, 5]
+        assert restored_cache.get(4, None) is None
+        assert 29 < restored_cache.cache[5].expires_at - time.monotonic() <= 30
+
+        path = os.path.join(tmp_dir, "shared")
+        with SharedLruCache(path, capacity=2, ways=2) as shared_cache:
+            shared_cache.put("a", [1, 2])
+            shared_cache.put("b", 2)
+            with SharedLruCache(path) as other_cache:
+                assert other_cache.get("a") == [1, 2]
+                other_cache.put("c", 3)
+
+            assert shared_cache.get("b") == -1
+            assert shared_cache.get("c") == 3
+            assert shared_cache.delete("c")
+            assert shared_cache.get("c", None) is None
+
+        _test_shared_threads(os.path.join(tmp_dir, "threaded"))
+
+    calls = []
+
+    @memoize(capacity=2)
+    def square(number):
+        calls.append(number)
+        return number * number
+
+    assert [square(2), square(3), square(2), square(4), square(3)] == (
+        [4, 9, 4, 16, 9]
+    )
+    assert calls == [2, 3, 4, 3]
+    assert square.loader.stats()["hits"] == 1
+    assert square.loader.stats()["evictions"] == 2
+
+    shared_cache = LruCache(10)
+
+    @memoize(cache=shared_cache)
+    def double(number):
+        return number * 2
+
+    @memoize(cache=shared_cache)
+    def triple(number):
+        return number * 3
+
+    assert [double(2), triple(2), double(2)] == [4, 6, 4]
+    assert len(shared_cache.cache) == 2
+
+    asyncio.run(_test_get_or_load())
+
+    ops_per_sec = benchmark_threads(capacity=1000, ops=20000, thread_count=4)
+    print(f"Ops per second: {ops_per_sec}")
+
+    bytes_per_entry = benchmark_memory(entries=10000)
+    print(f"Bytes per entry: {bytes_per_entry}")
+    assert bytes_per_entry["CompactLruCache"] < bytes_per_entry["LruCache"]
+
+    print("All test cases passed!")
+
+
+def _test_small_capacities(cache_class):
+    """Test that a cache never holds more entries than its capacity."""
+    for capacity in range(4):
+        our_cache = cache_class(capacity)
+        replay_trace(our_cache, [*range(10)] * 3)
+        held = sum(our_cache.get(key) != -1 for key in range(10))
+        assert held <= capacity
+        assert capacity == 0 or our_cache.get(9) == 9
+
+
+def _test_shared_threads(path):
+    """Test that threads sharing a SharedLruCache do not corrupt its file."""
+
+    def put_and_get(offset):
+        for key in range(offset, offset + 50):
+            shared_cache.put(key, key * 2)
+
+        return [shared_cache.get(key) for key in range(offset, offset + 50)]
+
+    with SharedLruCache(path) as shared_cache:
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            results = executor.map(put_and_get, range(0, 200, 50))
+            assert [value for values in results for value in values] == [
+                key * 2 for key in range(200)
+            ]
+
+
+async def _test_get_or_load():
+    """Test that concurrent misses on the same key share one load."""
+    loads = []
+
+    async def load(key):
+        loads.append(key)
+        await asyncio.sleep(0.01)
+        return key * 2
+
+    loader = CacheLoader(LruCache(10))
+    values = await asyncio.gather(
+        *(loader.get_or_load(key, load) for key in (1, 1, 2, 1, 2))
+    )
+    assert values == [2, 2, 4, 2, 4]
+    assert loads == [1, 2]
+    assert await loader.get_or_load(1, load) == 2
+    assert loader.stats()["loads"] == 2
+    assert loader.stats()["hits"] == 1
+
+    first = asyncio.ensure_future(loader.get_or_load(3, load))
+    second = asyncio.ensure_future(loader.get_or_load(3, load))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == 6
+    assert first.cancelled()
+    assert loads == [1, 2, 3]
+
+    @memoize()
+    async def fetch(key):
+        return await load(key)
+
+    assert await asyncio.gather(fetch(5), fetch(5)) == [10, 10]
+    assert loads == [1, 2, 3, 5]
+
+
+def benchmark_threads(capacity, ops, thread_count):
+    """Measures cache throughput when shared between several threads.
+
+    Args:
+        capacity: An int representing the capacity of each cache
+        ops: An int representing the number of get and put calls per thread
+        thread_count: An int representing the number of threads to run
+
+    Returns:
+        ops_per_sec: A dict of the get and put calls per second made on a
+            LruCache from one thread and on a ConcurrentLruCache from
+            thread_count threads
+    """
+    start = time.perf_counter()
+    _run_cache_ops(LruCache(capacity), ops, 0)
+    single_time = time.perf_counter() - start
+
+    our_cache = ConcurrentLruCache(capacity)
+    threads = [
+        threading.Thread(target=_run_cache_ops, args=(our_cache, ops, seed))
+        for seed in range(thread_count)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    concurrent_time = time.perf_counter() - start
+
+    ops_per_sec = {
+        "LruCache": ops / single_time,
+        "ConcurrentLruCache": ops * thread_count / concurrent_time,
+    }
+
+    return ops_per_sec
+
+
+def benchmark_policies(capacity, trace_length, key_count=None, seed=0):
+    """Replays synthetic traces against each eviction policy.
+
+    Args:
+        capacity: An int representing the capacity of each cache
+        trace_length: An int representing the number of keys in each trace
+        key_count: An int representing the number of distinct keys requested
+            apart from scans, defaulting to ten times the capacity
+        seed: An int used to seed the random traces
+
+    Returns:
+        results: A dict of trace names and dicts of policy names and tuples of
+            the hit ratio and ops per second
+    """
+    key_count = key_count or 10 * capacity
+    traces = {
+        "zipf": zipf_trace(trace_length, key_count, seed=seed),
+        "scan": scan_trace(trace_length, key_count, 2 * capacity, seed=seed),
+    }
+    policies = (LruCache, SegmentedLruCache, TwoQueueCache, TinyLfuCache)
+
+    results = {}
+    for trace_name, trace in traces.items():
+        results[trace_name] = {
+            policy.__name__: replay_trace(policy(capacity), trace)
+            for policy in policies
+        }
+
+    return results
+
+
+def replay_trace(our_cache, trace):
+    """Requests each key in a trace, putting the keys that miss.
+
+    Args:
+        our_cache: A cache object with get and put methods
+        trace: A list of keys to request
+
+    Returns:
+        hit_ratio: A float representing the fraction of requests that hit
+        ops_per_sec: A float representing the requests replayed per second
+    """
+    hits = 0
+    start = time.perf_counter()
+    for key in trace:
+        if our_cache.get(key) == -1:
+            our_cache.put(key, key)
+        else:
+            hits += 1
+
+    elapsed = time.perf_counter() - start
+    hit_ratio = hits / len(trace)
+    ops_per_sec = len(trace) / elapsed
+
+    return hit_ratio, ops_per_sec
+
+
+def zipf_trace(length, key_count, skew=1.0, seed=0):
+    """Creates a trace of keys following a Zipf distribution.
+
+    Args:
+        length: An int representing the number of keys in the trace
+        key_count: An int representing the number of distinct keys
+        skew: A float representing how strongly popular keys are favored
+        seed: An int used to seed the random trace
+
+    Returns:
+        A list of int keys where the key k is requested in proportion to
+        1 / (k + 1) ** skew
+    """
+    weights = [1 / (rank + 1) ** skew for rank in range(key_count)]
+
+    return random.Random(seed).choices(range(key_count), weights, k=length)
+
+
+def scan_trace(length, key_count, scan_length, skew=1.0, seed=0):
+    """Creates a Zipf trace interrupted by scans of keys used only once.
+
+    Args:
+        length: An int representing the number of keys in the trace
+        key_count: An int representing the number of distinct Zipf keys
+        scan_length: An int representing the number of keys in each scan
+        skew: A float representing how strongly popular keys are favored
+        seed: An int used to seed the random trace
+
+    Returns:
+        A list of int keys alternating between runs of Zipf keys and scans of
+        new keys, with scans making up about half of the trace
+    """
+    trace = zipf_trace(length, key_count, skew, seed)
+    next_scan_key = key_count
+    for start in range(0, length, 2 * scan_length):
+        scan_end = min(start + scan_length, length)
+        trace[start:scan_end] = range(
+            next_scan_key, next_scan_key + scan_end - start
+        )
+        next_scan_key += scan_end - start
+
+    return trace
+
+
+def benchmark_memory(entries):
+    """Measures the memory used per entry by each cache.
+
+    Args:
+        entries: An int representing the number of entries to put in each cache
+
+    Returns:
+        bytes_per_entry: A dict of the bytes allocated per entry by a full
+            LruCache and a full CompactLruCache, not counting keys and values
+    """
+    keys = list(range(1000, 1000 + entries))
+    bytes_per_entry = {}
+    for cache_class in (LruCache, CompactLruCache):
+        tracemalloc.start()
+        our_cache = cache_class(entries)
+        for key in keys:
+            our_cache.put(key, key)
+
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        bytes_per_entry[cache_class.__name__] = allocated / entries
+        del our_cache
+
+    return bytes_per_entry
+
+
+def _run_cache_ops(our_cache, ops, seed):
+    """Make a mix of get and put calls on a cache.
+
+    Args:
+        our_cache: A cache object with get and put methods
+        ops: An int representing the number of get and put calls to make
+        seed: An int used to vary the keys used between calls
+    """
+    key_range = 4 * ops
+    for idx in range(ops):
+        key = (idx * 7919 + seed * 104729) % key_range
+        if our_cache.get(key) == -1:
+            our_cache.put(key, idx)
 
 
 if __name__ == "__main__":
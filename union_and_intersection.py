@@ -5,8 +5,30 @@ Usage: union_and_intersection.py
 Classes:
     LinkedList()
     Node()
+    CompactLinkedList()
+    BloomFilter()
+    Bitmap()
 """
 
+import heapq
+import math
+import os
+import random
+import time
+import timeit
+import tracemalloc
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+ARRAY_CONTAINER_LIMIT = 4096
+CONTAINER_BITS = 16
+DEFAULT_CHUNK_SIZE = 1024
+_MIX_MULTIPLIER = 0x9E3779B97F4A7C15
+_MASK_64 = (1 << 64) - 1
+_MISSING = object()
+
 
 class LinkedList:
     """A linked list where each node points to the next node.
@@ -31,6 +53,13 @@ class LinkedList:
 
         return str(linked_list)
 
+    def __iter__(self):
+        """Iterates over the values from the head of the list."""
+        node = self.head
+        while node is not None:
+            yield node.value
+            node = node.next
+
     def push(self, value):
         """Add a node to the head of the list.
 
@@ -47,6 +76,31 @@ class LinkedList:
         node.next = self.head
         self.head = node
 
+    @classmethod
+    def from_bitmap(cls, bitmap):
+        """Creates a linked list of the values in a bitmap in ascending order.
+
+        Args:
+            bitmap: A Bitmap object holding the values
+
+        Returns:
+            linked_list: A LinkedList holding each value in the bitmap
+        """
+        linked_list = cls()
+        for value in reversed(bitmap.to_list()):
+            linked_list.push(value)
+
+        return linked_list
+
+    def to_bitmap(self):
+        """Creates a bitmap of the values in the linked list.
+
+        Returns:
+            A Bitmap object holding each value in the linked list, which must
+            all be non-negative ints
+        """
+        return Bitmap(self.nodes)
+
 
 class Node:
     """A node to store in a linked list.
@@ -66,6 +120,279 @@ class Node:
         return str(self.value)
 
 
+class CompactLinkedList:
+    """A list of ints held in arrays with the same interface as a LinkedList.
+
+    Values are appended to fixed size array chunks and read back from the last
+    one, so the most recently pushed value is at the head as in a LinkedList,
+    but each value takes the size of its array item instead of a Node and a
+    set entry. An optional Bloom filter stands in for the set of values.
+
+    Attributes:
+        typecode: A str representing the array typecode of the values
+        chunk_size: An int representing the max number of values per chunk
+        chunks: A list of arrays holding the values in the order pushed
+        length: An int representing the number of values in the list
+        bloom: A BloomFilter of the values in the list, or None
+    """
+
+    def __init__(
+        self, typecode="q", chunk_size=DEFAULT_CHUNK_SIZE, bloom_capacity=None
+    ):
+        """Set-up for the compact linked list."""
+        self.typecode = typecode
+        self.chunk_size = chunk_size
+        self.chunks = []
+        self.length = 0
+        self.bloom = None
+        if bloom_capacity is not None:
+            self.bloom = BloomFilter(bloom_capacity)
+
+    def __repr__(self):
+        """Represents the list values as regular python list."""
+        return str(list(self))
+
+    def __len__(self):
+        """Returns the number of values in the list."""
+        return self.length
+
+    def __iter__(self):
+        """Iterates over the values from the head of the list."""
+        for chunk in reversed(self.chunks):
+            yield from reversed(chunk)
+
+    def __contains__(self, value):
+        """Checks if a value is in the list.
+
+        The Bloom filter, if there is one, rules out most missing values
+        without scanning the chunks.
+        """
+        if self.bloom is not None and value not in self.bloom:
+            return False
+
+        return any(value in chunk for chunk in self.chunks)
+
+    def push(self, value):
+        """Add a value to the head of the list.
+
+        Args:
+            value: An int that fits in the list's typecode
+        """
+        if not self.chunks or len(self.chunks[-1]) == self.chunk_size:
+            self.chunks.append(array(self.typecode))
+
+        self.chunks[-1].append(value)
+        self.length += 1
+        if self.bloom is not None:
+            self.bloom.add(value)
+
+    def members(self, values):
+        """Finds which of the given values are in the list.
+
+        The values are narrowed down with the Bloom filter, if there is one,
+        and the rest are found in a single pass over the chunks, so no set of
+        every value in the list is needed.
+
+        Args:
+            values: An iterable of values to look for
+
+        Returns:
+            found: A set of the given values that are in the list
+        """
+        if self.bloom is not None:
+            candidates = {value for value in values if value in self.bloom}
+        else:
+            candidates = set(values)
+
+        found = set()
+        for chunk in self.chunks:
+            if len(found) == len(candidates):
+                break
+
+            found.update(candidates.intersection(chunk))
+
+        return found
+
+    def to_bitmap(self):
+        """Creates a bitmap of the values in the list.
+
+        Returns:
+            A Bitmap object holding each value in the list, which must all be
+            non-negative ints
+        """
+        return Bitmap(value for chunk in self.chunks for value in chunk)
+
+
+class BloomFilter:
+    """A set that may wrongly report holding values but never misses one.
+
+    Attributes:
+        size: An int representing the number of bits in the filter
+        hashes: An int representing the number of bits set for each value
+        bits: A bytearray holding the bits
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        """Set-up for the Bloom filter.
+
+        Args:
+            capacity: An int representing the number of values expected
+            error_rate: A float representing the chance of a false positive
+                once capacity values have been added
+        """
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def __contains__(self, value):
+        """Checks if a value may have been added to the filter."""
+        for bit in self.positions(value):
+            if not self.bits[bit >> 3] & (1 << (bit & 7)):
+                return False
+
+        return True
+
+    def add(self, value):
+        """Add a value to the filter.
+
+        Args:
+            value: A hashable value
+        """
+        for bit in self.positions(value):
+            self.bits[bit >> 3] |= 1 << (bit & 7)
+
+    def positions(self, value):
+        """Find the positions of the bits for a value.
+
+        The hash of the value is mixed so that nearby ints, whose hashes are
+        themselves, do not set nearby bits, and its two halves are combined to
+        give each position.
+
+        Args:
+            value: A hashable value
+
+        Returns:
+            A generator of int positions in the filter
+        """
+        mixed = (hash(value) * _MIX_MULTIPLIER) & _MASK_64
+        mixed ^= mixed >> 31
+        step = (mixed >> 32) | 1
+        start = mixed & 0xFFFFFFFF
+        return ((start + row * step) % self.size for row in range(self.hashes))
+
+
+class Bitmap:
+    """A compressed set of non-negative ints.
+
+    Values are split into containers by their high bits, and each container
+    holds the low 16 bits of its values either as a sorted array when it holds
+    few values or otherwise as the bits of an int. Union and intersection work
+    a container at a time, using bitwise operations on the ints, so most of
+    the work is done in C rather than one value at a time.
+
+    Attributes:
+        containers: A dict of the high bits of values and containers holding
+            the low bits as either an array of unsigned shorts or an int
+    """
+
+    def __init__(self, values=()):
+        """Set-up for the bitmap."""
+        low_values = {}
+        for value in values:
+            if value < 0:
+                raise ValueError(
+                    f"Bitmap values must not be negative: {value}"
+                )
+
+            high, low = divmod(value, 1 << CONTAINER_BITS)
+            low_values.setdefault(high, set()).add(low)
+
+        self.containers = {
+            high: _make_container(lows) for high, lows in low_values.items()
+        }
+
+    def __len__(self):
+        """The number of values in the bitmap."""
+        return sum(
+            _container_len(container) for container in self.containers.values()
+        )
+
+    def __iter__(self):
+        """Iterates over the values in ascending order."""
+        for high in sorted(self.containers):
+            offset = high << CONTAINER_BITS
+            for low in _container_values(self.containers[high]):
+                yield offset + low
+
+    def __contains__(self, value):
+        """Determines if a value is in the bitmap."""
+        high, low = divmod(value, 1 << CONTAINER_BITS)
+        container = self.containers.get(high)
+        if container is None:
+            return False
+
+        if isinstance(container, int):
+            return bool((container >> low) & 1)
+
+        return low in container
+
+    def __or__(self, other):
+        """Creates the union of two bitmaps."""
+        return self.union(other)
+
+    def __and__(self, other):
+        """Creates the intersection of two bitmaps."""
+        return self.intersection(other)
+
+    def to_list(self):
+        """Creates a list of the values in ascending order."""
+        return list(self)
+
+    def union(self, other):
+        """Creates a bitmap holding the values in either bitmap.
+
+        Args:
+            other: A Bitmap object
+
+        Returns:
+            union_set: A Bitmap object holding the union of the bitmaps
+        """
+        union_set = Bitmap()
+        union_set.containers = dict(self.containers)
+        for high, container in other.containers.items():
+            if high in union_set.containers:
+                union_set.containers[high] = _container_or(
+                    union_set.containers[high], container
+                )
+            else:
+                union_set.containers[high] = container
+
+        return union_set
+
+    def intersection(self, other):
+        """Creates a bitmap holding the values in both bitmaps.
+
+        Args:
+            other: A Bitmap object
+
+        Returns:
+            intersection_set: A Bitmap object holding the intersection of the
+                bitmaps
+        """
+        intersection_set = Bitmap()
+        for high in self.containers.keys() & other.containers.keys():
+            container = _container_and(
+                self.containers[high], other.containers[high]
+            )
+            if _container_len(container):
+                intersection_set.containers[high] = container
+
+        return intersection_set
+
+
 def main():
     """Main function call to test union and intersection functions."""
     linked_list_a = LinkedList()
@@ -106,29 +433,169 @@ def main():
     assert str(union_set) == "[7, 8, 9, 11, 21, 1, 2, 35, 65, 6, 4, 3, 23]"
     assert str(intersection_set) == "[]"
 
+    bitmap_a = Bitmap([3, 2, 4, 35, 6, 65, 6, 4, 3, 23, 1 << 20])
+    bitmap_b = Bitmap([*range(0, 10000, 2), 1 << 20, 23])
+    assert isinstance(bitmap_b.containers[0], int)
+    assert (bitmap_a | bitmap_b).to_list() == sorted(
+        {*range(0, 10000, 2), 3, 35, 65, 23, 1 << 20}
+    )
+    assert (bitmap_a & bitmap_b).to_list() == [2, 4, 6, 23, 1 << 20]
+    sparse_a = Bitmap(range(0, 1 << 20, 4099))
+    sparse_b = Bitmap([*range(0, 1 << 20, 4097), *range(3000)])
+    sparse_union = sparse_a | sparse_b
+    assert sparse_union.to_list() == sorted(set(sparse_a) | set(sparse_b))
+    assert isinstance(sparse_union.containers[1], array)
+    assert isinstance((sparse_union | bitmap_b).containers[0], int)
+    assert (Bitmap(range(3000)) | Bitmap(range(2000, 5000))).to_list() == (
+        list(range(5000))
+    )
+    assert len(bitmap_a & Bitmap()) == 0
+    assert 35 in bitmap_a and 36 not in bitmap_a
+
+    linked_list_a = LinkedList.from_bitmap(bitmap_a)
+    linked_list_b = LinkedList.from_bitmap(bitmap_b)
+    assert str(linked_list_a) == str(sorted(set(linked_list_a.nodes)))
+    assert str(bitmap_union(linked_list_a, linked_list_b)) == str(
+        (bitmap_a | bitmap_b).to_list()
+    )
+    assert str(bitmap_intersection(linked_list_a, linked_list_b)) == (
+        "[2, 4, 6, 23, 1048576]"
+    )
+
+    assert list(iter_union([3, 1, 3], linked_list_b, (1, 7))) == [
+        3,
+        1,
+        *linked_list_b,
+        7,
+    ]
+    assert list(iter_intersection([4, 2, 6, 2], iter([2, 6, 9]))) == [2, 6]
+    assert list(iter_intersection([1, 2, 3], [3, 2], {2: "a", 3: "b"})) == [
+        2,
+        3,
+    ]
+    assert list(iter_sorted_union([1, 3, 3, 5], [2, 3, 6], [])) == [
+        1,
+        2,
+        3,
+        5,
+        6,
+    ]
+    evens = range(0, 100000, 2)
+    triples = array("i", range(0, 100000, 3))
+    assert list(iter_sorted_intersection(evens, [6, 6, 7, 12, 99996])) == [
+        6,
+        12,
+        99996,
+    ]
+    assert list(iter_sorted_intersection(evens, triples, [0, 30, 31])) == [
+        0,
+        30,
+    ]
+    assert list(iter_sorted_intersection(evens, [])) == []
+
+    compact_list_a = CompactLinkedList(chunk_size=4, bloom_capacity=20)
+    compact_list_b = CompactLinkedList(typecode="i")
+    for element in elements_a:
+        compact_list_a.push(element)
+
+    for element in elements_b:
+        compact_list_b.push(element)
+
+    assert len(compact_list_a) == 10 and len(compact_list_a.chunks) == 3
+    assert str(compact_list_a) == "[23, 3, 4, 6, 65, 6, 35, 4, 2, 3]"
+    assert 65 in compact_list_a and 66 not in compact_list_a
+    assert compact_list_a.members([2, 5, 23, 2]) == {2, 23}
+    assert str(union(compact_list_a, compact_list_b)) == (
+        "[7, 8, 9, 11, 21, 1, 2, 35, 65, 6, 4, 3, 23]"
+    )
+    assert str(intersection(compact_list_a, compact_list_b)) == "[]"
+    assert str(intersection(compact_list_a, linked_list_b)) == "[2, 6, 4, 23]"
+    assert str(intersection(linked_list_a, compact_list_a)) == (
+        "[65, 35, 23, 6, 4, 3, 2]"
+    )
+    assert compact_list_b.to_bitmap().to_list() == sorted(set(elements_b))
+
+    bloom = BloomFilter(1000)
+    for value in range(0, 2000, 2):
+        bloom.add(value)
+
+    assert all(value in bloom for value in range(0, 2000, 2))
+    assert sum(value in bloom for value in range(1, 2000, 2)) < 50
+
+    memory = benchmark_list_memory(size=20000)
+    assert memory["compact_linked_list"] * 4 < memory["linked_list"]
+    print(f"List memory benchmark (bytes per value): {memory}")
+
+    _test_partitioned_operations()
+
+    timings = benchmark_set_operations(size=20000)
+    print(f"Dense set operation benchmark (seconds): {timings}")
+    timings = benchmark_set_operations(size=20000, value_range=1 << 32)
+    print(f"Sparse set operation benchmark (seconds): {timings}")
+    timings = benchmark_partitioned(
+        num_lists=8, size=5000, worker_counts=(1, 2), repeat=1
+    )
+    print(
+        f"Partitioned benchmark on {os.cpu_count()} CPUs (seconds): {timings}"
+    )
+
     print("All test cases passed!")
 
 
+def _test_partitioned_operations():
+    """Test the partitioned operations on each kind of list."""
+    linked_lists = []
+    for start in range(3):
+        linked_list = LinkedList()
+        for value in range(start, 60, 1 + start):
+            linked_list.push(value)
+
+        linked_lists.append(linked_list)
+
+    partitioned_set = partitioned_union(linked_lists, partitions=3)
+    assert sorted(partitioned_set) == list(range(60))
+    assert len(partitioned_set.nodes) == 60
+    partitioned_set = partitioned_intersection(
+        linked_lists, partitions=4, max_workers=2
+    )
+    assert sorted(partitioned_set) == list(range(5, 60, 6))
+    assert (
+        partitioned_intersection([linked_lists[0], LinkedList()]).head is None
+    )
+    assert partitioned_union([]).head is None
+    compact_lists = []
+    for start in range(3):
+        compact_list = CompactLinkedList("i", chunk_size=7)
+        for value in range(start, 60, 1 + start):
+            compact_list.push(value)
+
+        compact_lists.append(compact_list)
+
+    partitioned_set = partitioned_intersection(
+        [*compact_lists, array("q", range(-5, 60, 2))], partitions=4
+    )
+    assert sorted(partitioned_set) == list(range(5, 60, 6))
+    partitioned_set = partitioned_union([compact_lists[2], array("q")])
+    assert sorted(partitioned_set) == list(range(2, 60, 3))
+
+
 def union(llist_a, llist_b):
     """Creates a linked list that is the union of two linked lists.
 
     Args:
-        llist_a: A LinkedList representing the first list which to create the
-            union of
-        llist_b: A LinkedList representing the second list which to create the
-            union of
+        llist_a: A LinkedList or CompactLinkedList representing the first list
+            which to create the union of
+        llist_b: A LinkedList or CompactLinkedList representing the second
+            list which to create the union of
 
     Returns:
         union_set: A LinkedList representing the union of the two given lists
     """
     union_set = LinkedList()
     for llist in (llist_a, llist_b):
-        node = llist.head
-        while node is not None:
-            if node.value not in union_set.nodes:
-                union_set.push(node.value)
-
-            node = node.next
+        for value in llist:
+            if value not in union_set.nodes:
+                union_set.push(value)
 
     return union_set
 
@@ -137,26 +604,746 @@ def intersection(llist_a, llist_b):
     """Creates a linked list that is the intersection of two linked lists.
 
     Args:
-        llist_a: A LinkedList representing the first list which to create the
-            intersection of
-        llist_b: A LinkedList representing the second list which to create the
-            intersection of
+        llist_a: A LinkedList or CompactLinkedList representing the first list
+            which to create the intersection of
+        llist_b: A LinkedList or CompactLinkedList representing the second
+            list which to create the intersection of
 
     Returns:
         intersection_set: A LinkedList representing the intersection of the two
             given lists
     """
+    if isinstance(llist_b, LinkedList):
+        members = llist_b.nodes
+    else:
+        members = llist_b.members(llist_a)
+
     intersection_set = LinkedList()
-    node = llist_a.head
-    while node is not None:
-        value = node.value
-        if value in llist_b.nodes and value not in intersection_set.nodes:
+    for value in llist_a:
+        if value in members and value not in intersection_set.nodes:
             intersection_set.push(value)
 
-        node = node.next
-
     return intersection_set
 
 
+def iter_union(*iterables):
+    """Yields each distinct value of several iterables as it is first seen.
+
+    Args:
+        *iterables: Iterables of hashable values, such as LinkedLists
+
+    Yields:
+        Each value in any of the iterables once, in order of first appearance
+    """
+    seen = set()
+    for iterable in iterables:
+        for value in iterable:
+            if value not in seen:
+                seen.add(value)
+                yield value
+
+
+def iter_intersection(*iterables):
+    """Yields each distinct value that is in every one of several iterables.
+
+    The largest iterable, or the first if their sizes are unknown, is streamed
+    while the others are held as sets that are checked smallest first, since
+    the smallest set is the most likely to rule a value out.
+
+    Args:
+        *iterables: Iterables of hashable values, such as LinkedLists
+
+    Yields:
+        Each value in all of the iterables once, in the order it appears in
+        the streamed iterable
+    """
+    if not iterables:
+        return
+
+    iterables = list(iterables)
+    if all(hasattr(iterable, "__len__") for iterable in iterables):
+        iterables.sort(key=len, reverse=True)
+
+    streamed = iterables.pop(0)
+    value_sets = sorted(
+        (
+            (
+                iterable
+                if isinstance(iterable, (set, frozenset))
+                else set(iterable)
+            )
+            for iterable in iterables
+        ),
+        key=len,
+    )
+    seen = set()
+    for value in streamed:
+        if value not in seen and all(
+            value in value_set for value_set in value_sets
+        ):
+            seen.add(value)
+            yield value
+
+
+def iter_sorted_union(*iterables):
+    """Yields the union of several sorted iterables in sorted order.
+
+    Only the next value of each iterable is held at a time.
+
+    Args:
+        *iterables: Iterables of values sorted in ascending order
+
+    Yields:
+        Each value in any of the iterables once, in ascending order
+    """
+    previous = _MISSING
+    for value in heapq.merge(*iterables):
+        if previous is _MISSING or value != previous:
+            previous = value
+            yield value
+
+
+def iter_sorted_intersection(*sequences):
+    """Yields the intersection of several sorted sequences in sorted order.
+
+    Each value of the smallest sequence is searched for in the others with a
+    galloping search from where the last search ended, which takes far fewer
+    comparisons than a merge when the smallest sequence is much smaller than
+    the rest. Only a cursor for each sequence is held.
+
+    Args:
+        *sequences: Sequences supporting len and indexing, such as lists,
+            arrays or ranges, of values sorted in ascending order
+
+    Yields:
+        Each value in all of the sequences once, in ascending order
+    """
+    if not sequences:
+        return
+
+    smallest, *others = sorted(sequences, key=len)
+    cursors = [0] * len(others)
+    previous = _MISSING
+    for value in smallest:
+        if previous is not _MISSING and value == previous:
+            continue
+
+        previous = value
+        for idx, sequence in enumerate(others):
+            cursors[idx] = _gallop(sequence, value, cursors[idx])
+            if cursors[idx] == len(sequence):
+                return
+
+            if sequence[cursors[idx]] != value:
+                break
+        else:
+            yield value
+
+
+def _gallop(sequence, value, start):
+    """Finds the first position at or after start holding at least value.
+
+    Args:
+        sequence: A sequence of values sorted in ascending order
+        value: The value to search for
+        start: An int representing the position to search from
+
+    Returns:
+        An int representing the first position at or after start holding a
+        value no less than the given value, or the length of the sequence
+    """
+    length = len(sequence)
+    if start >= length or sequence[start] >= value:
+        return start
+
+    step = 1
+    while start + step < length and sequence[start + step] < value:
+        step *= 2
+
+    return bisect_left(
+        sequence, value, start + step // 2 + 1, min(start + step + 1, length)
+    )
+
+
+def partitioned_union(llists, partitions=None, max_workers=None):
+    """Creates a linked list that is the union of many linked lists of ints.
+
+    Args:
+        llists: A list of LinkedLists, CompactLinkedLists or arrays of ints
+            that fit in 64 bits
+        partitions: An int representing the number of partitions to hash the
+            values into, defaulting to the number of workers
+        max_workers: An int representing the max number of processes to use,
+            defaulting to the number of processors on the machine
+
+    Returns:
+        A LinkedList representing the union of the given lists
+    """
+    return _partitioned_operation("union", llists, partitions, max_workers)
+
+
+def partitioned_intersection(llists, partitions=None, max_workers=None):
+    """Creates a linked list that is the intersection of many linked lists.
+
+    Args:
+        llists: A list of LinkedLists, CompactLinkedLists or arrays of ints
+            that fit in 64 bits
+        partitions: An int representing the number of partitions to hash the
+            values into, defaulting to the number of workers
+        max_workers: An int representing the max number of processes to use,
+            defaulting to the number of processors on the machine
+
+    Returns:
+        A LinkedList representing the intersection of the given lists
+    """
+    return _partitioned_operation(
+        "intersection", llists, partitions, max_workers
+    )
+
+
+def _partitioned_operation(operation, llists, partitions, max_workers):
+    """Runs a set operation on many linked lists across a process pool.
+
+    The values of every list are copied into a shared memory block and the
+    workers hash spans of it into partitions, then the partitions are copied
+    into a second block, laid out partition by partition, so that each worker
+    only reads the slices for its own partition. Equal values always hash to
+    the same partition, so the result is the concatenation of the results of
+    the operation on each partition.
+
+    Args:
+        operation: A str, either "union" or "intersection"
+        llists: A list of LinkedLists, CompactLinkedLists or arrays of ints
+            that fit in 64 bits
+        partitions: An int representing the number of partitions, defaulting
+            to the number of workers
+        max_workers: An int representing the max number of processes to use,
+            defaulting to the number of processors on the machine
+
+    Returns:
+        result_set: A LinkedList representing the result of the operation
+    """
+    result_set = LinkedList()
+    if not llists:
+        return result_set
+
+    max_workers = max_workers or os.cpu_count() or 1
+    partitions = partitions or max_workers
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        buckets = _scatter_lists(executor, llists, partitions, max_workers)
+        block, bounds = _share_arrays(
+            bucket for row in buckets for bucket in row
+        )
+        del buckets
+        try:
+            tasks = [
+                (operation, block.name, bounds[start : start + len(llists)])
+                for start in range(0, len(bounds), len(llists))
+            ]
+            for values in executor.map(_run_partition, tasks):
+                for value in values:
+                    result_set.push(value)
+        finally:
+            block.close()
+            block.unlink()
+
+    return result_set
+
+
+def _scatter_lists(executor, llists, partitions, spans_per_list):
+    """Hashes the values of many lists into partitions across a process pool.
+
+    The parent only copies each list into shared memory, which for arrays and
+    the chunks of a CompactLinkedList is a copy of their buffers rather than a
+    walk over their values.
+
+    Args:
+        executor: A ProcessPoolExecutor to hash the values in
+        llists: A list of LinkedLists, CompactLinkedLists or arrays of ints
+        partitions: An int representing the number of partitions
+        spans_per_list: An int representing the number of tasks to split the
+            values of each list across
+
+    Returns:
+        buckets: A list, for each partition, of a list, for each list, of the
+            arrays of that list's values in the partition
+    """
+    block, bounds = _share_arrays(_value_chunks(llist) for llist in llists)
+    try:
+        tasks = []
+        for list_idx, (start, stop) in enumerate(bounds):
+            step = max(-(-(stop - start) // spans_per_list), 1)
+            for span_start in range(start, stop, step):
+                span_stop = min(span_start + step, stop)
+                tasks.append(
+                    (block.name, list_idx, span_start, span_stop, partitions)
+                )
+
+        buckets = [[[] for _ in llists] for _ in range(partitions)]
+        for list_idx, span_buckets in executor.map(_scatter_span, tasks):
+            for partition, values in enumerate(span_buckets):
+                buckets[partition][list_idx].append(values)
+    finally:
+        block.close()
+        block.unlink()
+
+    return buckets
+
+
+def _value_chunks(llist):
+    """Finds arrays holding the values of a list.
+
+    Args:
+        llist: A LinkedList, CompactLinkedList or array of ints
+
+    Returns:
+        A list of arrays of the values, which are the list's own arrays unless
+        it is a LinkedList, whose nodes have to be walked to copy them
+    """
+    if isinstance(llist, array):
+        return [llist]
+
+    if isinstance(llist, CompactLinkedList):
+        return llist.chunks
+
+    return [array("q", llist)]
+
+
+def _share_arrays(groups):
+    """Copies groups of arrays one after another into shared memory.
+
+    Args:
+        groups: An iterable of lists of arrays of ints that fit in 64 bits
+
+    Returns:
+        block: A SharedMemory object holding the values, which the caller must
+            close and unlink
+        bounds: A list of (start, stop) tuples giving the slice of the block
+            holding the values of each group
+    """
+    groups = list(groups)
+    total = sum(len(values) for group in groups for values in group)
+    block = shared_memory.SharedMemory(
+        create=True, size=max(total, 1) * array("q").itemsize
+    )
+    bounds = []
+    position = 0
+    try:
+        view = block.buf.cast("q")
+        for group in groups:
+            start = position
+            for values in group:
+                if values.typecode != "q":
+                    values = array("q", values)
+
+                view[position : position + len(values)] = values
+                position += len(values)
+
+            bounds.append((start, position))
+
+        view.release()
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+
+    return block, bounds
+
+
+def _scatter_span(task):
+    """Hashes a span of one list's values in shared memory into partitions.
+
+    Args:
+        task: A tuple of the name of the shared memory block, the index of the
+            list, the start and stop of the span and the number of partitions
+
+    Returns:
+        A tuple of the index of the list and a list of arrays of the values in
+        each partition
+    """
+    name, list_idx, start, stop, partitions = task
+    buckets = [array("q") for _ in range(partitions)]
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        view = block.buf.cast("q")
+        for value in view[start:stop]:
+            buckets[hash(value) % partitions].append(value)
+
+        view.release()
+    finally:
+        block.close()
+
+    return list_idx, buckets
+
+
+def _run_partition(task):
+    """Runs a set operation on one partition of the values in shared memory.
+
+    Args:
+        task: A tuple of the operation, either "union" or "intersection", the
+            name of the shared memory block and a list of (start, stop) tuples
+            giving the slice of the block holding each list's values
+
+    Returns:
+        An array of the values in the result of the operation on the partition
+    """
+    operation, name, slices = task
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        view = block.buf.cast("q")
+        if operation == "union":
+            values = set()
+            for start, stop in slices:
+                values.update(view[start:stop])
+        else:
+            slices = sorted(slices, key=lambda bounds: bounds[1] - bounds[0])
+            start, stop = slices[0]
+            values = set(view[start:stop])
+            for start, stop in slices[1:]:
+                if not values:
+                    break
+
+                values.intersection_update(view[start:stop])
+
+        view.release()
+    finally:
+        block.close()
+
+    return array("q", values)
+
+
+def bitmap_union(llist_a, llist_b):
+    """Creates a linked list that is the union of two linked lists of ints.
+
+    Args:
+        llist_a: A LinkedList of non-negative ints
+        llist_b: A LinkedList of non-negative ints
+
+    Returns:
+        A LinkedList representing the union of the two given lists in
+        ascending order
+    """
+    return LinkedList.from_bitmap(llist_a.to_bitmap() | llist_b.to_bitmap())
+
+
+def bitmap_intersection(llist_a, llist_b):
+    """Creates a linked list that is the intersection of two linked lists.
+
+    Args:
+        llist_a: A LinkedList of non-negative ints
+        llist_b: A LinkedList of non-negative ints
+
+    Returns:
+        A LinkedList representing the intersection of the two given lists in
+        ascending order
+    """
+    return LinkedList.from_bitmap(llist_a.to_bitmap() & llist_b.to_bitmap())
+
+
+def benchmark_set_operations(size, repeat=3, seed=0, value_range=None):
+    """Times union and intersection of linked lists, bitmaps and sets.
+
+    Args:
+        size: An int representing the number of values in each list
+        repeat: An int representing the number of times to time each operation
+        seed: An int used to seed the random values
+        value_range: An int representing the number of possible values, which
+            defaults to 4 * size so that the values are dense, or can be set
+            to a large number such as 2 ** 32 for sparse ids
+
+    Returns:
+        timings: A dict of the best time in seconds taken by each operation,
+            where bitmap operations are timed both on their own and including
+            the conversion from and to linked lists
+    """
+    rng = random.Random(seed)
+    values = range(value_range or 4 * size)
+    linked_list_a = LinkedList()
+    linked_list_b = LinkedList()
+    for value in rng.sample(values, size):
+        linked_list_a.push(value)
+
+    for value in rng.sample(values, size):
+        linked_list_b.push(value)
+
+    bitmap_a = linked_list_a.to_bitmap()
+    bitmap_b = linked_list_b.to_bitmap()
+    set_a = linked_list_a.nodes
+    set_b = linked_list_b.nodes
+    operations = {
+        "union": lambda: union(linked_list_a, linked_list_b),
+        "intersection": lambda: intersection(linked_list_a, linked_list_b),
+        "set_union": lambda: set_a | set_b,
+        "set_intersection": lambda: set_a & set_b,
+        "bitmap_union": lambda: bitmap_a | bitmap_b,
+        "bitmap_intersection": lambda: bitmap_a & bitmap_b,
+        "linked_list_bitmap_union": lambda: bitmap_union(
+            linked_list_a, linked_list_b
+        ),
+        "linked_list_bitmap_intersection": lambda: bitmap_intersection(
+            linked_list_a, linked_list_b
+        ),
+    }
+
+    timings = {}
+    for name, operation in operations.items():
+        timings[name] = min(timeit.repeat(operation, number=1, repeat=repeat))
+
+    return timings
+
+
+def benchmark_partitioned(
+    num_lists, size, worker_counts=(1, 2, 4), repeat=3, seed=0
+):
+    """Times partitioned union and intersection across worker counts.
+
+    Args:
+        num_lists: An int representing the number of lists to combine
+        size: An int representing the number of values in each list
+        worker_counts: A tuple of the numbers of processes to time
+        repeat: An int representing the number of times to time each operation
+        seed: An int used to seed the random values
+
+    Returns:
+        timings: A dict of the best time in seconds taken by each operation,
+            keyed by the operation, the kind of list and the number of
+            workers, where the serial operations fold the pairwise union and
+            intersection functions over the linked lists. The CPU time of the
+            parent process alone is also given for each partitioned operation,
+            since it is the part that does not scale with more workers and
+            stays visible on a machine with a single processor
+    """
+    rng = random.Random(seed)
+    linked_lists = []
+    compact_lists = []
+    for _ in range(num_lists):
+        linked_list = LinkedList()
+        compact_list = CompactLinkedList()
+        for value in rng.sample(range(2 * size), size):
+            linked_list.push(value)
+            compact_list.push(value)
+
+        linked_lists.append(linked_list)
+        compact_lists.append(compact_list)
+
+    def fold(operation):
+        result_set = linked_lists[0]
+        for linked_list in linked_lists[1:]:
+            result_set = operation(result_set, linked_list)
+
+        return result_set
+
+    operations = {
+        "serial_union": lambda: fold(union),
+        "serial_intersection": lambda: fold(intersection),
+    }
+    for workers in worker_counts:
+        for kind, llists in (
+            ("linked", linked_lists),
+            ("compact", compact_lists),
+        ):
+            for name, operation in (
+                ("union", partitioned_union),
+                ("intersection", partitioned_intersection),
+            ):
+                operations[f"partitioned_{name}_{kind}_{workers}"] = (
+                    lambda op=operation, lists=llists, count=workers: op(
+                        lists, max_workers=count
+                    )
+                )
+
+    timings = {}
+    for name, operation in operations.items():
+        timings[name] = min(timeit.repeat(operation, number=1, repeat=repeat))
+        if name.startswith("partitioned"):
+            timings[f"{name}_parent_cpu"] = min(
+                timeit.repeat(
+                    operation,
+                    timer=time.process_time,
+                    number=1,
+                    repeat=repeat,
+                )
+            )
+
+    return timings
+
+
+def benchmark_list_memory(size, seed=0):
+    """Measures the memory taken per value by each kind of linked list.
+
+    Args:
+        size: An int representing the number of values to push
+        seed: An int used to seed the random values
+
+    Returns:
+        memory: A dict of the bytes allocated per value by each kind of list
+    """
+    rng = random.Random(seed)
+    values = rng.sample(range(1 << 40), size)
+    factories = {
+        "linked_list": LinkedList,
+        "compact_linked_list": CompactLinkedList,
+        "compact_linked_list_bloom": lambda: CompactLinkedList(
+            bloom_capacity=size
+        ),
+    }
+
+    memory = {}
+    for name, factory in factories.items():
+        tracemalloc.start()
+        llist = factory()
+        for value in values:
+            llist.push(value)
+
+        allocated, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory[name] = allocated / size
+        del llist
+
+    return memory
+
+
+def _make_container(lows):
+    """Creates a container from the low bits of values.
+
+    Args:
+        lows: An iterable of ints between 0 and 65535
+
+    Returns:
+        A sorted array of unsigned shorts if there are at most
+        ARRAY_CONTAINER_LIMIT values or else an int with the values' bits set
+    """
+    lows = sorted(set(lows))
+    if len(lows) <= ARRAY_CONTAINER_LIMIT:
+        return array("H", lows)
+
+    bits = bytearray(1 << (CONTAINER_BITS - 3))
+    for low in lows:
+        bits[low >> 3] |= 1 << (low & 7)
+
+    return int.from_bytes(bits, "little")
+
+
+def _normalize(bits):
+    """Creates the smaller kind of container for the values in an int.
+
+    Args:
+        bits: An int with the bits of the low values set
+
+    Returns:
+        A container holding the values
+    """
+    if bits.bit_count() <= ARRAY_CONTAINER_LIMIT:
+        return array("H", _container_values(bits))
+
+    return bits
+
+
+def _container_bits(container):
+    """Converts a container into an int with its values' bits set.
+
+    Args:
+        container: An array of unsigned shorts or an int
+
+    Returns:
+        An int with the bits of the container's values set
+    """
+    if isinstance(container, int):
+        return container
+
+    bits = bytearray(1 << (CONTAINER_BITS - 3))
+    for low in container:
+        bits[low >> 3] |= 1 << (low & 7)
+
+    return int.from_bytes(bits, "little")
+
+
+def _container_values(container):
+    """Lists the values in a container in ascending order.
+
+    Args:
+        container: An array of unsigned shorts or an int
+
+    Returns:
+        A list or array of the ints in the container
+    """
+    if not isinstance(container, int):
+        return container
+
+    values = []
+    bits = format(container, "b")[::-1]
+    low = bits.find("1")
+    while low != -1:
+        values.append(low)
+        low = bits.find("1", low + 1)
+
+    return values
+
+
+def _container_len(container):
+    """Counts the values in a container.
+
+    Args:
+        container: An array of unsigned shorts or an int
+
+    Returns:
+        An int representing the number of values in the container
+    """
+    if isinstance(container, int):
+        return container.bit_count()
+
+    return len(container)
+
+
+def _container_or(container_a, container_b):
+    """Creates a container of the values in either container.
+
+    Two arrays are merged as arrays and only become an int once they hold
+    more than ARRAY_CONTAINER_LIMIT values between them, so sparse containers
+    never pay for a full 65536 bit int.
+
+    Args:
+        container_a: An array of unsigned shorts or an int
+        container_b: An array of unsigned shorts or an int
+
+    Returns:
+        A container holding the values in either container
+    """
+    if type(container_a) is array and type(container_b) is array:
+        lows = sorted(set(container_a).union(container_b))
+        if len(lows) <= ARRAY_CONTAINER_LIMIT:
+            return array("H", lows)
+
+        return _make_container(lows)
+
+    return _container_bits(container_a) | _container_bits(container_b)
+
+
+def _container_and(container_a, container_b):
+    """Creates a container of the values in both containers.
+
+    Args:
+        container_a: An array of unsigned shorts or an int
+        container_b: An array of unsigned shorts or an int
+
+    Returns:
+        A container holding the values in both containers
+    """
+    if isinstance(container_a, int) and isinstance(container_b, int):
+        return _normalize(container_a & container_b)
+
+    if isinstance(container_a, int):
+        container_a, container_b = container_b, container_a
+
+    if isinstance(container_b, int):
+        bits = container_b.to_bytes(1 << (CONTAINER_BITS - 3), "little")
+        return array(
+            "H",
+            (low for low in container_a if bits[low >> 3] >> (low & 7) & 1),
+        )
+
+    return array("H", sorted(set(container_a).intersection(container_b)))
+
+
 if __name__ == "__main__":
     main()